@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -57,6 +58,11 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'app.urls'
 
+# Response compression, brotli when the Brotli package is installed
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -79,6 +85,12 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
+# Set DB_POOLER_MODE=1 behind PgBouncer in transaction mode. Server-side
+# cursors and startup options do not survive it, so set statement_timeout
+# on the database role instead.
+DB_POOLER_MODE = os.environ.get('DB_POOLER_MODE', '') == '1'
+DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 0))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -86,9 +98,90 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Seconds to keep a connection open between requests; 0 closes it
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Ping reused connections at request start, see core.db
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER_MODE,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
+    }
+}
+if DB_STATEMENT_TIMEOUT and not DB_POOLER_MODE:
+    DATABASES['default']['OPTIONS']['options'] = (
+        f'-c statement_timeout={DB_STATEMENT_TIMEOUT}'
+    )
+
+# Read replicas, e.g. DB_REPLICA_HOSTS=replica1,replica2. Safe-method reads
+# of the recipe API go to a random replica, see core.routers. Under test
+# they mirror the test database instead of getting one of their own.
+for _index, _host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    DATABASES[f'replica_{_index}'] = dict(
+        DATABASES['default'], HOST=_host.strip(),
+        OPTIONS=dict(DATABASES['default']['OPTIONS']),
+        TEST={'MIRROR': 'default'}
+    )
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Seconds a user's reads stay on the primary after they wrote something
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+REPLICA_STICKY_CACHE = 'default'
+
+
+# The default cache holds state every worker must see: tag and ingredient
+# list generations, failed login counters and replica read pins. LocMem
+# keeps it per process, which is only right for tests and a single
+# worker. Production must point CACHE_BACKEND and CACHE_LOCATION at a
+# shared cache (memcached, or Django's DatabaseCache after
+# createcachetable); `manage.py check --deploy` warns otherwise.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
+RECIPE_ATTR_CACHE = 'default'
+RECIPE_ATTR_CACHE_TIMEOUT = int(os.environ.get('RECIPE_ATTR_CACHE_TIMEOUT', 300))
+
+# In-process token lookup cache, optionally backed by a shared cache alias
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 60))
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000))
+TOKEN_AUTH_SHARED_CACHE = os.environ.get('TOKEN_AUTH_SHARED_CACHE', '')
+# Seconds a token authenticates for after it was issued; 0 never expires
+TOKEN_EXPIRE_AFTER = int(os.environ.get('TOKEN_EXPIRE_AFTER', 7 * 24 * 60 * 60))
+TOKEN_PRUNE_BATCH_SIZE = int(os.environ.get('TOKEN_PRUNE_BATCH_SIZE', 1000))
+
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 5000))
+
+# Password hashing. PASSWORD_HASHER picks the hasher used for new hashes;
+# the others stay listed so existing hashes verify and get upgraded on login.
+# 'argon2' needs the argon2-cffi package.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'core.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'core.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+# 0 keeps Django's default iteration count
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 0))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 65536))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 2))
+
+# Failed logins allowed per email and per client address within the window
+LOGIN_RATE_LIMIT_CACHE = 'default'
+LOGIN_RATE_LIMIT_PER_EMAIL = int(os.environ.get('LOGIN_RATE_LIMIT_PER_EMAIL', 5))
+LOGIN_RATE_LIMIT_PER_IP = int(os.environ.get('LOGIN_RATE_LIMIT_PER_IP', 50))
+LOGIN_RATE_LIMIT_WINDOW = int(os.environ.get('LOGIN_RATE_LIMIT_WINDOW', 300))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -130,5 +223,47 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = '/vol/web/media'
+
+# Uploaded media never changes under its UUID name, so cache it for a year
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 365 * 24 * 60 * 60))
+# Internal location prefix for nginx X-Accel-Redirect, e.g. '/protected-media/'
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '')
+# Hand files to Apache/lighttpd with X-Sendfile instead
+MEDIA_X_SENDFILE = os.environ.get('MEDIA_X_SENDFILE', '') == '1'
+
+# Resized copies generated for every uploaded recipe image
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': {'size': (200, 200), 'format': 'JPEG'},
+    'thumbnail_webp': {'size': (200, 200), 'format': 'WEBP'},
+    'medium': {'size': (800, 800), 'format': 'JPEG'},
+    'medium_webp': {'size': (800, 800), 'format': 'WEBP'},
+}
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_IMAGE_MAX_UPLOAD_SIZE = int(
+    os.environ.get('RECIPE_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40000000))
+
+# In-process search index used when the database is not Postgres
+RECIPE_SEARCH_INDEX_USERS = int(os.environ.get('RECIPE_SEARCH_INDEX_USERS', 100))
+RECIPE_SEARCH_MAX_RESULTS = int(os.environ.get('RECIPE_SEARCH_MAX_RESULTS', 1000))
+
+# Rows fetched per round trip, and per tag/ingredient lookup, when exporting
+RECIPE_EXPORT_CHUNK_SIZE = int(os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 2000))
+# Recipes written per transaction by the import_recipes command
+RECIPE_IMPORT_CHUNK_SIZE = int(os.environ.get('RECIPE_IMPORT_CHUNK_SIZE', 1000))
 STATIC_ROOT = '/vol/web/static'
-AUTH_USER_MODEL = 'core.User'
\ No newline at end of file
+AUTH_USER_MODEL = 'core.User'
+
+REST_FRAMEWORK = {
+    # Uses orjson when installed, with identical output
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'recipe.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    # Reverse proxies in front of the app, e.g. 1 behind nginx. Client
+    # addresses are then taken from X-Forwarded-For instead of REMOTE_ADDR.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
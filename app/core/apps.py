@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core import checks, signals  # noqa: F401
+        from core.db import close_unusable_connections
+        request_started.connect(close_unusable_connections)
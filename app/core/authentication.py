@@ -0,0 +1,160 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    '''Bounded, thread-safe LRU of token key -> (user, token) with a TTL'''
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            stale = [
+                key for key, (_, (user, _)) in self._entries.items()
+                if user.pk == user_id
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+local_cache = TokenCache(
+    settings.TOKEN_AUTH_CACHE_SIZE, settings.TOKEN_AUTH_CACHE_TTL
+)
+
+
+def _shared_cache():
+    alias = settings.TOKEN_AUTH_SHARED_CACHE
+    return caches[alias] if alias else None
+
+
+def _shared_key(key):
+    return f'auth-token:{key}'
+
+
+def invalidate_token(key):
+    '''Forget a token in this process and in the shared tier'''
+    local_cache.delete(key)
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(_shared_key(key))
+
+
+def invalidate_user(user_id):
+    '''Forget every cached token resolving to the user'''
+    local_cache.delete_user(user_id)
+    shared = _shared_cache()
+    if shared is not None:
+        keys = Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+        shared.delete_many([_shared_key(key) for key in keys])
+
+
+def token_expires(token):
+    '''Return when the token stops authenticating, or None if it never does'''
+    if not settings.TOKEN_EXPIRE_AFTER:
+        return None
+    return token.created + timedelta(seconds=settings.TOKEN_EXPIRE_AFTER)
+
+
+def token_expired(token):
+    expires = token_expires(token)
+    return expires is not None and expires <= timezone.now()
+
+
+def expired_before():
+    '''Return the creation time before which tokens have expired'''
+    return timezone.now() - timedelta(seconds=settings.TOKEN_EXPIRE_AFTER)
+
+
+def rotate_token(user):
+    '''Replace the user's token with a freshly created one'''
+    with transaction.atomic():
+        Token.objects.filter(user=user).delete()
+        return Token.objects.create(user=user)
+
+
+def get_valid_token(user):
+    '''Return the user's current token, rotating it once it has expired'''
+    token, created = Token.objects.get_or_create(user=user)
+    if not created and token_expired(token):
+        token = rotate_token(user)
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    '''Token authentication that caches the token to user resolution
+
+    Lookups are answered from an in-process LRU first, then from an
+    optional shared Django cache, and only then from the database. The
+    signal handlers in core.signals drop entries when a token is deleted
+    or its user changes. Other processes only see that through the shared
+    tier, so their local entries live at most TOKEN_AUTH_CACHE_TTL seconds.
+    Tokens older than TOKEN_EXPIRE_AFTER seconds are rejected.
+    '''
+
+    def authenticate_credentials(self, key):
+        cached = local_cache.get(key)
+        shared = _shared_cache()
+        if cached is None and shared is not None:
+            cached = shared.get(_shared_key(key))
+            if cached is not None:
+                local_cache.set(key, cached)
+
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            local_cache.set(key, cached)
+            if shared is not None:
+                shared.set(
+                    _shared_key(key), cached, settings.TOKEN_AUTH_CACHE_TTL
+                )
+
+        user, token = cached
+        if token_expired(token):
+            invalidate_token(key)
+            raise AuthenticationFailed('Token has expired.')
+        # Requests may modify request.user, so never hand out the cached one.
+        return copy.copy(user), token
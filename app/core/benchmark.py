@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+class BenchmarkCommand(BaseCommand):
+    '''Base for management commands comparing two implementations
+
+    Subclasses create their fixtures in `setup` and time code paths with
+    `measure` from `run`. Everything happens inside a transaction that is
+    rolled back at the end, so a benchmark never leaves rows behind.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Number of timed runs per measurement'
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        with transaction.atomic():
+            self.setup(**options)
+            self.run(**options)
+            transaction.set_rollback(True)
+
+    def setup(self, **options):
+        '''Create the fixture data'''
+
+    def run(self, **options):
+        raise NotImplementedError('subclasses must implement run()')
+
+    def measure(self, label, func):
+        '''Time `func` and report its best run and steady-state query count'''
+        func()
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        queries = len(ctx.captured_queries)
+
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+        best = min(timings) * 1000
+        self.stdout.write(f'{label}: best {best:.2f} ms, {queries} queries')
+        return best
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+# Backends whose entries are only visible to the process that wrote them
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+# Settings naming a cache alias whose state must be shared by all workers
+SHARED_STATE_CACHES = (
+    'RECIPE_ATTR_CACHE', 'LOGIN_RATE_LIMIT_CACHE', 'REPLICA_STICKY_CACHE',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    '''Warn when cross-request state would live in one process only'''
+    warnings = []
+    for name in SHARED_STATE_CACHES:
+        alias = getattr(settings, name)
+        backend = settings.CACHES[alias]['BACKEND']
+        if backend in PROCESS_LOCAL_CACHES:
+            warnings.append(Warning(
+                f'{name} uses the {alias!r} cache, backed by {backend}, '
+                'which other worker processes cannot see.',
+                hint='Set CACHE_BACKEND and CACHE_LOCATION to a shared '
+                     'cache such as memcached or DatabaseCache.',
+                id='core.W001',
+            ))
+    return warnings
@@ -0,0 +1,20 @@
+from django.db import connections
+
+
+def close_unusable_connections(**kwargs):
+    '''Drop persistent connections the server has closed since their last use
+
+    Django only discards a kept-alive connection once it is past
+    CONN_MAX_AGE or a query on it has failed, so a connection killed by a
+    database restart or idle timeout would fail the next request. Databases
+    with CONN_HEALTH_CHECKS get a cheap ping instead, and a fresh connection
+    is opened lazily when the ping fails.
+    '''
+    for connection in connections.all():
+        settings_dict = connection.settings_dict
+        if (connection.connection is None
+                or not settings_dict.get('CONN_MAX_AGE')
+                or not settings_dict.get('CONN_HEALTH_CHECKS')):
+            continue
+        if not connection.is_usable():
+            connection.close()
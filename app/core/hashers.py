@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher
+)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    '''PBKDF2 with the iteration count taken from PASSWORD_PBKDF2_ITERATIONS
+
+    The algorithm name is unchanged, so existing hashes keep verifying and
+    are re-encoded on the next successful login whenever the configured
+    count differs from the stored one.
+    '''
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    '''Argon2 with its cost parameters taken from settings
+
+    Needs the optional argon2-cffi package. Hashes whose parameters differ
+    from the configured ones are upgraded on the next successful login.
+    '''
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.authentication import CachedTokenAuthentication, local_cache
+from core.benchmark import BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    '''Compare plain and cached token authentication per request'''
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--requests', type=int, default=1000)
+
+    def setup(self, **options):
+        user = get_user_model().objects.create_user(
+            'bench-token-auth@example.com', 'bench-password'
+        )
+        self.token = Token.objects.create(user=user)
+        self.factory = APIRequestFactory()
+
+    def run(self, **options):
+        for label, authenticator in (
+            ('token', TokenAuthentication()),
+            ('cached token', CachedTokenAuthentication()),
+        ):
+            def authenticate_many():
+                for _ in range(options['requests']):
+                    request = Request(self.factory.get(
+                        '/', HTTP_AUTHORIZATION=f'Token {self.token.key}'
+                    ))
+                    authenticator.authenticate(request)
+
+            local_cache.clear()
+            self.measure(f'{label} x{options["requests"]}', authenticate_many)
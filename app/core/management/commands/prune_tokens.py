@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.authtoken.models import Token
+
+from core.authentication import expired_before
+
+
+class Command(BaseCommand):
+    '''Delete expired auth tokens in small batches'''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TOKEN_PRUNE_BATCH_SIZE,
+            help='Rows deleted per transaction'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='Seconds to pause between batches'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.TOKEN_EXPIRE_AFTER:
+            self.stdout.write('Token expiry is disabled, nothing to prune')
+            return
+
+        start = time.monotonic()
+        cutoff = expired_before()
+        deleted = 0
+        while True:
+            # Each batch is its own short transaction, so locks are only
+            # ever held on batch_size rows at a time.
+            keys = list(
+                Token.objects.filter(created__lte=cutoff)
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not keys:
+                break
+            deleted += Token.objects.filter(pk__in=keys).delete()[0]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired tokens in {elapsed:.2f}s'
+        ))
@@ -1,20 +1,103 @@
-import time 
-from django.db import connection, connections
-from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+import random
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import InterfaceError, OperationalError
+
+
+@contextmanager
+def connect_timeout(connection, seconds):
+    '''Bound how long a single connection attempt may block
+
+    Overrides any connect_timeout in the database OPTIONS for the duration
+    of the block.
+    '''
+    if connection.vendor != 'postgresql':
+        yield
+        return
+    options = connection.settings_dict.setdefault('OPTIONS', {})
+    missing = object()
+    previous = options.get('connect_timeout', missing)
+    options['connect_timeout'] = seconds
+    try:
+        yield
+    finally:
+        if previous is missing:
+            del options['connect_timeout']
+        else:
+            options['connect_timeout'] = previous
 
 
 class Command(BaseCommand):
-    '''Django command to pause execution until database is available'''
+    '''Django command to pause execution until database is available
+
+    Each attempt opens a connection and runs SELECT 1. Failed attempts are
+    retried after an exponentially growing, fully jittered delay until the
+    overall deadline passes.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='Seconds to keep trying before giving up'
+        )
+        parser.add_argument(
+            '--connect-timeout', type=int, default=5,
+            help='Seconds a single connection attempt may take'
+        )
+        parser.add_argument(
+            '--base-delay', type=float, default=0.1,
+            help='Upper bound of the first retry delay in seconds'
+        )
+        parser.add_argument(
+            '--max-delay', type=float, default=5,
+            help='Upper bound of any retry delay in seconds'
+        )
+
+    def probe(self, connection):
+        '''Run a trivial query, dropping the connection if it fails'''
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        except (OperationalError, InterfaceError):
+            connection.close()
+            raise
 
     def handle(self, *args, **options):
         self.stdout.write('Waiting for DB')
-        db_conn = None
-        while not db_conn:
+        connection = connections[options['database']]
+        start = time.monotonic()
+        deadline = start + options['timeout']
+        attempt = 0
+
+        while True:
+            attempt += 1
             try:
-                db_conn=connections['default']
-            except OperationalError:
-                self.stdout.write('DB unavailble, waiting 1 second')
-                time.sleep(1)
-        
-        self.stdout.write(self.style.SUCCESS('Database available'))
\ No newline at end of file
+                with connect_timeout(connection, options['connect_timeout']):
+                    self.probe(connection)
+                break
+            except (OperationalError, InterfaceError) as exc:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Database unavailable after {attempt} attempts '
+                        f'in {time.monotonic() - start:.2f}s: {exc}'
+                    )
+                ceiling = min(
+                    options['max_delay'],
+                    options['base_delay'] * 2 ** (attempt - 1)
+                )
+                delay = min(random.uniform(0, ceiling), remaining)
+                self.stdout.write(
+                    f'DB unavailable, retrying in {delay:.2f}s ({exc})'
+                )
+                time.sleep(delay)
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Database available after {elapsed:.2f}s ({attempt} attempts)'
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-18 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    '''Index token creation times so expired tokens are found by range scan'''
+
+    dependencies = [
+        ('authtoken', '0003_tokenproxy'),
+        ('core', '0009_recipe_image_sha256'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS authtoken_token_created_idx '
+            'ON authtoken_token (created)',
+            'DROP INDEX IF EXISTS authtoken_token_created_idx',
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 3.1.14 on 2026-10-18 03:14
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+# Must match the template of recipe.search.DocumentVector for the planner
+# to use it.
+CREATE_INDEX = (
+    'CREATE INDEX recipe_search_idx ON core_recipe '
+    "USING gin (to_tsvector('english'::regconfig, search_document))"
+)
+DROP_INDEX = 'DROP INDEX IF EXISTS recipe_search_idx'
+
+
+def fill_search_documents(apps, schema_editor):
+    Recipe = apps.get_model('core', 'Recipe')
+    names = defaultdict(list)
+    for relation in ('ingredients', 'tags'):
+        through = Recipe._meta.get_field(relation).remote_field.through
+        related = 'ingredient' if relation == 'ingredients' else 'tag'
+        rows = through.objects.values_list('recipe_id', f'{related}__name')
+        for recipe_id, name in rows.iterator():
+            names[recipe_id].append(name)
+
+    batch = []
+    for recipe in Recipe.objects.only('id', 'title').iterator():
+        recipe.search_document = ' '.join([recipe.title, *names[recipe.pk]])
+        batch.append(recipe)
+        if len(batch) == 500:
+            Recipe.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    Recipe.objects.bulk_update(batch, ['search_document'])
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_authtoken_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(
+                fields=['user', 'updated_at'], name='recipe_user_updated_idx'
+            ),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
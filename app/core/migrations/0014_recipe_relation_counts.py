@@ -0,0 +1,38 @@
+# Generated by Django 3.1.14 on 2026-10-18 03:37
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counts(apps, schema_editor):
+    Recipe = apps.get_model('core', 'Recipe')
+    counts = {}
+    for relation, column in (('ingredients', 'ingredient_count'), ('tags', 'tag_count')):
+        through = Recipe._meta.get_field(relation).remote_field.through
+        rows = through.objects.filter(recipe_id=OuterRef('pk')).order_by().values(
+            'recipe_id'
+        ).annotate(count=Count('pk')).values('count')
+        counts[column] = Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+    Recipe.objects.update(**counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_attr_normalized_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='tag_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
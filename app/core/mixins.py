@@ -0,0 +1,46 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from core import routers
+
+
+class ReplicaReadMixin:
+    '''Serve a view's safe-method requests from a read replica
+
+    Override `get_read_database` to change the choice per request. Clients
+    can force the primary with an `X-Read-Primary: 1` header, and users who
+    just wrote through the view are kept on the primary for
+    REPLICA_STICKY_SECONDS so they read their own writes.
+    '''
+    read_from_replica = True
+
+    def get_read_database(self, request):
+        '''Return the alias to read from, or None for the primary'''
+        if not self.read_from_replica or request.method not in SAFE_METHODS:
+            return None
+        if request.META.get('HTTP_X_READ_PRIMARY') == '1':
+            return None
+        user = request.user
+        if user.is_authenticated and routers.is_pinned_to_primary(user.pk):
+            return None
+        return routers.choose_replica()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._read_token = routers.set_read_database(
+            self.get_read_database(request)
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (request.method not in SAFE_METHODS
+                and response.status_code < 400
+                and request.user.is_authenticated):
+            routers.pin_to_primary(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        self._read_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._read_token is not None:
+                routers.reset_read_database(self._read_token)
@@ -11,6 +11,27 @@ def recipe_image_file_path(instance, filename):
 
     return os.path.join('uploads/recipe/', filename)
 
+
+# casefold() expands a character to at most three, e.g. 'ﬃ' to 'ffi'
+NORMALIZED_NAME_LENGTH = 3 * 255
+
+
+def normalize_name(name):
+    '''Return the form of a tag or ingredient name used to spot duplicates'''
+    return ' '.join(name.split()).casefold()
+
+
+class NormalizedNameMixin:
+    '''Fill `normalized_name` from `name` on every save'''
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_name(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'normalized_name'}
+        super().save(*args, **kwargs)
+
+
 class UserManager(BaseUserManager):
 
     def create_user(self, email, password=None, **extra_fields):
@@ -46,26 +67,65 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
-class Tag(models.Model):
+class Tag(NormalizedNameMixin, models.Model):
     '''Tag to be used for a recipe'''
     name = models.CharField(max_length=255)
+    # Case and whitespace folded name, unique per user
+    normalized_name = models.CharField(
+        max_length=NORMALIZED_NAME_LENGTH, default='', editable=False
+    )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-name', 'id'], name='tag_user_name_idx'),
+        ]
+        constraints = [
+            # Rows from before normalized_name existed keep it blank until
+            # the merge_duplicate_attrs command has merged them.
+            models.UniqueConstraint(
+                fields=['user', 'normalized_name'],
+                condition=~models.Q(normalized_name=''),
+                name='tag_user_normalized_name_uniq'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(NormalizedNameMixin, models.Model):
     '''Ingredient to be used in a recipe'''
     name = models.CharField(max_length=255)
+    # Case and whitespace folded name, unique per user
+    normalized_name = models.CharField(
+        max_length=NORMALIZED_NAME_LENGTH, default='', editable=False
+    )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='ingredient_user_name_idx'
+            ),
+        ]
+        constraints = [
+            # Rows from before normalized_name existed keep it blank until
+            # the merge_duplicate_attrs command has merged them.
+            models.UniqueConstraint(
+                fields=['user', 'normalized_name'],
+                condition=~models.Q(normalized_name=''),
+                name='ingredient_user_normalized_name_uniq'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -83,6 +143,31 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_variants = models.JSONField(default=dict, blank=True)
+    image_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Title, ingredient and tag names kept together for full-text search
+    search_document = models.TextField(blank=True, default='', editable=False)
+    # Size of each relation, kept in step by recipe.counts
+    ingredient_count = models.PositiveIntegerField(default=0, editable=False)
+    tag_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+            # Count and latest change of a user's recipes, used as the
+            # version of list ETags and of the in-process search index
+            models.Index(
+                fields=['user', 'updated_at'], name='recipe_user_updated_idx'
+            ),
+            # Range filters and keyset ordering on time and price
+            models.Index(
+                fields=['user', 'time_minutes', 'id'], name='recipe_user_time_idx'
+            ),
+            models.Index(
+                fields=['user', 'price', 'id'], name='recipe_user_price_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
\ No newline at end of file
@@ -0,0 +1,51 @@
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# orjson writes exponents as 1e16 where json writes 1e+16, so output with
+# a digit followed by 'e' is re-encoded by the stdlib to stay identical.
+EXPONENT_RE = re.compile(rb'[0-9]e')
+
+
+class FastJSONRenderer(JSONRenderer):
+    '''JSONRenderer that encodes with orjson when it is installed
+
+    The bytes are the same as JSONRenderer's. Anything orjson cannot match
+    exactly (indented or non-compact output, ASCII escaping, NaN handling
+    when STRICT_JSON is off, keys that are not strings, huge integers or
+    exponent floats) is handed to the stdlib encoder. Other types go
+    through the DRF encoder's default(), as before. The one exception is
+    NaN and infinity with STRICT_JSON on: orjson writes null where the
+    stdlib encoder raises an error.
+    '''
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or not self.strict
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            )
+        except TypeError:
+            # JSONEncodeError is a TypeError
+            return super().render(data, accepted_media_type, renderer_context)
+        if EXPONENT_RE.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same strict javascript subset escaping as JSONRenderer
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,76 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+_read_database = ContextVar('read_database', default=None)
+
+
+def current_read_database():
+    '''Return the alias reads are routed to, or None for the primary'''
+    return _read_database.get()
+
+
+def set_read_database(alias):
+    '''Route reads to `alias`, returning a token for reset_read_database'''
+    return _read_database.set(alias)
+
+
+def reset_read_database(token):
+    _read_database.reset(token)
+
+
+@contextmanager
+def use_read_database(alias):
+    '''Route reads inside the block to `alias`; None means the primary'''
+    token = set_read_database(alias)
+    try:
+        yield
+    finally:
+        reset_read_database(token)
+
+
+def choose_replica():
+    '''Return a random replica alias, or None when there are none'''
+    if not settings.REPLICA_DATABASES:
+        return None
+    return random.choice(settings.REPLICA_DATABASES)
+
+
+def _pin_key(user_id):
+    return f'db-primary-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    '''Keep the user's reads on the primary until replicas have caught up'''
+    caches[settings.REPLICA_STICKY_CACHE].set(
+        _pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS
+    )
+
+
+def is_pinned_to_primary(user_id):
+    return bool(caches[settings.REPLICA_STICKY_CACHE].get(_pin_key(user_id)))
+
+
+class ReplicaRouter:
+    '''Send reads to the replica picked for the current request
+
+    Nothing is routed unless a view opted in through use_read_database, so
+    writes, authentication and management commands always use the primary.
+    '''
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.REPLICA_DATABASES
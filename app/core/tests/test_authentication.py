@@ -0,0 +1,171 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import TokenCache, local_cache
+
+
+ME_URL = reverse('user:me')
+TOKEN_URL = reverse('user:token')
+REFRESH_URL = reverse('user:token-refresh')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    '''Test caching of token authentication lookups'''
+
+    def setUp(self):
+        local_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123',
+            name='Test'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeated_requests_skip_token_query(self):
+        '''test only the first request resolves the token in the db'''
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        '''test deleting a token stops it authenticating at once'''
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        '''test deactivating a user stops their cached token working'''
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_not_served_stale(self):
+        '''test an updated user is reloaded on the next request'''
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'New name'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New name')
+
+
+class TokenCacheTests(TestCase):
+    '''Test the token LRU'''
+
+    def test_least_recently_used_evicted(self):
+        '''test the cache stays within its size'''
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+
+    @patch('core.authentication.time.monotonic')
+    def test_entries_expire(self, monotonic):
+        '''test entries are dropped after their ttl'''
+        monotonic.return_value = 100
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+
+        monotonic.return_value = 161
+
+        self.assertIsNone(cache.get('a'))
+
+
+class TokenExpiryTests(TestCase):
+    '''Test expiring and rotating tokens'''
+
+    def setUp(self):
+        local_cache.clear()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123',
+            name='Test'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+
+    def expire(self, token):
+        Token.objects.filter(pk=token.pk).update(
+            created=timezone.now() - timedelta(days=8)
+        )
+
+    def test_expired_token_rejected(self):
+        '''test a token past TOKEN_EXPIRE_AFTER no longer authenticates'''
+        self.expire(self.token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_rotates_expired_token(self):
+        '''test logging in replaces an expired token and keeps a valid one'''
+        payload = {'email': 'test@test.com', 'password': 'test@123'}
+        res = self.client.post(TOKEN_URL, payload)
+        self.assertEqual(res.data['token'], self.token.key)
+        self.assertIsNotNone(res.data['expires'])
+
+        self.expire(self.token)
+        res = self.client.post(TOKEN_URL, payload)
+
+        self.assertNotEqual(res.data['token'], self.token.key)
+        self.assertEqual(Token.objects.filter(user=self.user).count(), 1)
+
+    def test_refresh_replaces_token(self):
+        '''test refreshing issues a new token and revokes the old one'''
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        res = self.client.post(REFRESH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['token'], self.token.key)
+        self.assertEqual(self.client.get(ME_URL).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {res.data["token"]}')
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_200_OK)
+
+    def test_prune_tokens(self):
+        '''test the prune command deletes only expired tokens'''
+        users = [
+            get_user_model().objects.create_user(f'u{i}@test.com', 'test@123')
+            for i in range(3)
+        ]
+        for user in users[:2]:
+            self.expire(Token.objects.create(user=user))
+        Token.objects.create(user=users[2])
+        out = StringIO()
+
+        call_command('prune_tokens', batch_size=1, stdout=out)
+
+        self.assertEqual(Token.objects.count(), 2)
+        self.assertIn('Deleted 2 expired tokens', out.getvalue())
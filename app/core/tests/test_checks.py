@@ -0,0 +1,22 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_shared_caches
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_process_local_cache_warns(self):
+        '''Test a LocMem default cache is reported for each shared use'''
+        warnings = check_shared_caches(None)
+        self.assertEqual(len(warnings), 3)
+        self.assertEqual({warning.id for warning in warnings}, {'core.W001'})
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache',
+    }})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_caches(None), [])
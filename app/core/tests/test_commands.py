@@ -1,21 +1,52 @@
-from unittest.mock import call, patch
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.management.commands.wait_for_db import connect_timeout
+
+PROBE = 'core.management.commands.wait_for_db.Command.probe'
+
+
 class CommandTests(TestCase):
 
     def test_wait_for_db_ready(self):
         '''Test waiting for db when db is available'''
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        out = StringIO()
+        call_command('wait_for_db', stdout=out)
+        self.assertIn('Database available after', out.getvalue())
+        self.assertIn('(1 attempts)', out.getvalue())
 
+    @patch('core.management.commands.wait_for_db.random.uniform')
     @patch('time.sleep', return_value=True)
-    def test_wait_for_db(self, ts):
-        '''Test waiting for db'''
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+    def test_wait_for_db(self, ts, uniform):
+        '''Test waiting for db backs off exponentially'''
+        uniform.side_effect = lambda low, high: high
+        with patch(PROBE) as probe:
+            probe.side_effect = [OperationalError] * 5 + [None]
+            call_command('wait_for_db', base_delay=0.1, max_delay=1, stdout=StringIO())
+            self.assertEqual(probe.call_count, 6)
+        delays = [round(c.args[0], 2) for c in ts.call_args_list]
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.8, 1])
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_deadline(self, ts):
+        '''Test waiting for db gives up once the deadline passes'''
+        with patch(PROBE) as probe:
+            probe.side_effect = OperationalError('refused')
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=0, stdout=StringIO())
+            self.assertEqual(probe.call_count, 1)
+
+    def test_connect_timeout_overrides_setting(self):
+        '''Test --connect-timeout wins over the configured OPTIONS value'''
+        connection = SimpleNamespace(
+            vendor='postgresql',
+            settings_dict={'OPTIONS': {'connect_timeout': 5}}
+        )
+        with connect_timeout(connection, 2):
+            self.assertEqual(connection.settings_dict['OPTIONS']['connect_timeout'], 2)
+        self.assertEqual(connection.settings_dict['OPTIONS']['connect_timeout'], 5)
@@ -0,0 +1,64 @@
+from unittest.mock import patch
+
+from django.core import signals
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.db import close_unusable_connections
+
+
+TOKEN_URL = reverse('user:token')
+
+
+@patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True})
+class PersistentConnectionTests(TestCase):
+    '''Test persistent connections and their health checks'''
+
+    def test_reused_connection_pinged(self):
+        '''Test a request starting on an open connection pings it once'''
+        client = APIClient()
+        client.post(TOKEN_URL, {'email': 'a@test.com', 'password': 'x'})
+
+        with patch.object(connection, 'is_usable', wraps=connection.is_usable) as ping:
+            client.post(TOKEN_URL, {'email': 'b@test.com', 'password': 'x'})
+
+        ping.assert_called_once()
+
+    def test_unusable_connection_closed(self):
+        '''Test a connection failing its ping is dropped at request start'''
+        connection.ensure_connection()
+        with patch.object(connection, 'is_usable', return_value=False), \
+                patch.object(connection, 'close') as close:
+            close_unusable_connections()
+
+        close.assert_called_once()
+
+    def test_no_ping_without_persistent_connections(self):
+        '''Test connections closed after each request are not pinged'''
+        connection.ensure_connection()
+        with patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 0}), \
+                patch.object(connection, 'is_usable') as ping:
+            close_unusable_connections()
+
+        ping.assert_not_called()
+
+
+class ConnectionReuseTests(TransactionTestCase):
+    '''Test which connections survive the end of a request'''
+
+    def finish_request(self, max_age):
+        '''Open a connection under `max_age`, end a request, report if it closed'''
+        with patch.dict(connection.settings_dict, {'CONN_MAX_AGE': max_age}):
+            # close_at is worked out from CONN_MAX_AGE when connecting.
+            connection.connect()
+            with patch.object(connection, 'close', wraps=connection.close) as close:
+                signals.request_finished.send(sender=self.__class__)
+        return close.called
+
+    def test_connection_kept_with_max_age(self):
+        self.assertFalse(self.finish_request(60))
+
+    def test_connection_closed_without_max_age(self):
+        self.assertTrue(self.finish_request(0))
@@ -0,0 +1,24 @@
+from django.contrib.auth import authenticate, get_user_model
+from django.test import TestCase, override_settings
+
+
+class HasherTests(TestCase):
+    '''Test the configurable password hashers'''
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_pbkdf2_uses_configured_iterations(self):
+        '''Test new hashes use PASSWORD_PBKDF2_ITERATIONS'''
+        user = get_user_model().objects.create_user('test@test.com', 'test_pass')
+
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_rehash_on_login(self):
+        '''Test a login re-encodes a hash made with an outdated cost'''
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            get_user_model().objects.create_user('test@test.com', 'test_pass')
+
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            user = authenticate(username='test@test.com', password='test_pass')
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
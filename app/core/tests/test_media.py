@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+
+class MediaServingTests(TestCase):
+    '''Test serving uploaded media files'''
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        os.makedirs(os.path.join(self.media_root, 'uploads/recipe'))
+        self.content = bytes(range(256)) * 4
+        with open(os.path.join(self.media_root, 'uploads/recipe/a.jpg'), 'wb') as f:
+            f.write(self.content)
+        self.url = '/media/uploads/recipe/a.jpg'
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_full_response_headers(self):
+        '''test a file is served with validators and immutable caching'''
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), self.content)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertIn('max-age=31536000', res['Cache-Control'])
+
+    def test_conditional_get(self):
+        '''test revalidating with the etag returns 304'''
+        etag = self.client.get(self.url)['ETag']
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_range_request(self):
+        '''test a byte range is answered with 206'''
+        res = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), self.content[10:20])
+        self.assertEqual(res['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(res['Content-Length'], '10')
+
+    def test_suffix_range_request(self):
+        '''test a suffix range returns the final bytes'''
+        res = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), self.content[-5:])
+
+    def test_stale_if_range_sends_whole_file(self):
+        '''test a range against an old version is ignored'''
+        res = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"'
+        )
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_unsatisfiable_range(self):
+        '''test a range past the end of the file returns 416'''
+        res = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertFalse(res.has_header('Cache-Control'))
+        self.assertEqual(res['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_path_traversal_not_found(self):
+        '''test paths outside the media root are not served'''
+        res = self.client.get('/media/../settings.py')
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_missing_file_not_found(self):
+        '''test a missing file is a 404'''
+        res = self.client.get('/media/uploads/recipe/missing.jpg')
+
+        self.assertEqual(res.status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect(self):
+        '''test the body is handed to the proxy when configured'''
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res['X-Accel-Redirect'], '/protected-media/uploads/recipe/a.jpg'
+        )
+        self.assertEqual(res.content, b'')
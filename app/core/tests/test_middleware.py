@@ -0,0 +1,81 @@
+import gzip
+from unittest.mock import patch
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import middleware
+from core.middleware import CompressionMiddleware, choose_encoding
+
+
+BODY = b'{"title": "Soup"}' * 200
+
+
+def compressed(response, accept, **headers):
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept, **headers)
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+
+    def json_response(self, body=BODY):
+        return HttpResponse(body, content_type='application/json')
+
+    def test_choose_encoding(self):
+        '''Test Accept-Encoding negotiation honours q-values'''
+        with patch.object(middleware, 'brotli', object()):
+            self.assertEqual(choose_encoding('gzip, deflate, br'), 'br')
+            self.assertEqual(choose_encoding('gzip;q=1, br;q=0.5'), 'gzip')
+            self.assertEqual(choose_encoding('br;q=0, *'), 'gzip')
+            self.assertIsNone(choose_encoding('identity'))
+            self.assertIsNone(choose_encoding(''))
+        with patch.object(middleware, 'brotli', None):
+            self.assertEqual(choose_encoding('br, gzip'), 'gzip')
+            self.assertIsNone(choose_encoding('br'))
+
+    def test_gzip(self):
+        '''Test JSON responses are gzipped when the client accepts it'''
+        response = compressed(self.json_response(), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_brotli(self):
+        '''Test brotli is preferred when it is installed'''
+        if middleware.brotli is None:
+            self.skipTest('Brotli is not installed')
+        response = compressed(self.json_response(), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(middleware.brotli.decompress(response.content), BODY)
+
+    @override_settings(COMPRESSION_MIN_SIZE=1024)
+    def test_small_response_not_compressed(self):
+        '''Test bodies under the size threshold are sent as they are'''
+        response = compressed(self.json_response(b'{"id": 1}'), 'gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'{"id": 1}')
+
+    def test_images_not_compressed(self):
+        '''Test content types that are already compressed are left alone'''
+        response = compressed(
+            HttpResponse(BODY, content_type='image/png'), 'gzip'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming(self):
+        '''Test streaming responses are compressed chunk by chunk'''
+        response = StreamingHttpResponse(
+            iter([BODY, BODY]), content_type='application/x-ndjson'
+        )
+        response = compressed(response, 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), BODY * 2)
+
+    def test_etag_weakened(self):
+        '''Test a strong ETag is made weak on compressed responses'''
+        response = self.json_response()
+        response['ETag'] = '"abc"'
+        response = compressed(response, 'gzip')
+        self.assertEqual(response['ETag'], 'W/"abc"')
@@ -61,6 +61,17 @@ class ModelTests(TestCase):
         self.assertEqual(str(tag), tag.name)
 
 
+    def test_normalized_name_fits_longest_name(self):
+        '''Test a name that grows when case folded still fits its column'''
+        name = '\ufb03' * 255
+        tag = models.Tag.objects.create(user=sample_user(), name=name)
+
+        self.assertEqual(tag.normalized_name, 'ffi' * 255)
+        for model in (models.Tag, models.Ingredient):
+            field = model._meta.get_field('normalized_name')
+            self.assertLessEqual(len(tag.normalized_name), field.max_length)
+
+
     def test_ingredient_str(self):
         '''Test the inredient string representation'''
         ingredient = models.Ingredient.objects.create(
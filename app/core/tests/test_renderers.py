@@ -0,0 +1,47 @@
+import datetime
+import uuid
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+from core.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def assertSameJSON(self, data, **kwargs):
+        self.assertEqual(
+            FastJSONRenderer().render(data, **kwargs),
+            JSONRenderer().render(data, **kwargs)
+        )
+
+    def test_same_bytes_as_json_renderer(self):
+        '''Test the fast renderer produces JSONRenderer's exact output'''
+        self.assertSameJSON({
+            'title': 'Crème brûlée     "quoted" \\ \n',
+            'price': Decimal('5.50'),
+            'time': datetime.datetime(2020, 1, 2, 3, 4, 5, 123456),
+            'uuid': uuid.UUID(int=1),
+            'floats': [0.1, 1.5, 1e16, 1e-7, -0.0],
+            'nested': [{'id': 1, 'tags': [1, 2]}, None, True, False],
+            'big': 2 ** 70,
+            3: 'int key',
+        })
+
+    def test_indent_falls_back(self):
+        '''Test indented output is still produced by JSONRenderer'''
+        self.assertSameJSON(
+            {'a': [1, 2]},
+            accepted_media_type='application/json; indent=4'
+        )
+
+    def test_without_orjson(self):
+        '''Test the renderer still works when orjson is not installed'''
+        with patch.object(renderers, 'orjson', None):
+            self.assertSameJSON({'title': 'Soup', 'price': Decimal('1.00')})
+
+    def test_none_renders_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
@@ -0,0 +1,117 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.conf import settings
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag
+from core.routers import ReplicaRouter, use_read_database
+
+
+TAGS_URL = reverse('recipe:tag-list')
+
+# A second alias mirroring the test database, as DB_REPLICA_HOSTS would
+# add, so tests can see which connection actually ran a query.
+REPLICA = 'replica_test'
+connections.databases.setdefault(REPLICA, dict(
+    settings.DATABASES['default'], TEST={'MIRROR': 'default'}
+))
+
+
+class ReplicaRouterTests(TestCase):
+    '''Test the read replica router'''
+
+    def test_reads_follow_current_database(self):
+        '''Test reads only leave the primary inside use_read_database'''
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Tag))
+
+        with use_read_database('replica_1'):
+            self.assertEqual(router.db_for_read(Tag), 'replica_1')
+            self.assertEqual(router.db_for_write(Tag), 'default')
+
+    @override_settings(REPLICA_DATABASES=['replica_1'])
+    def test_replicas_not_migrated(self):
+        '''Test migrations only run against the primary'''
+        router = ReplicaRouter()
+        self.assertTrue(router.allow_migrate('default', 'core'))
+        self.assertFalse(router.allow_migrate('replica_1', 'core'))
+
+
+# The test database doubles as the replica, so the routing decisions are
+# observed on the router rather than by which connection ran the query.
+@override_settings(REPLICA_DATABASES=['default'])
+class ReplicaReadTests(TestCase):
+    '''Test recipe API reads are routed to replicas'''
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com', 'test@123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def read_databases(self, **extra):
+        '''GET the tag list, returning the aliases the router picked'''
+        seen = set()
+        original = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            alias = original(router, model, **hints)
+            seen.add(alias)
+            return alias
+
+        with patch.object(ReplicaRouter, 'db_for_read', record):
+            res = self.client.get(TAGS_URL, **extra)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return seen
+
+    def test_safe_reads_use_replica(self):
+        '''Test listing tags reads from the replica'''
+        self.assertEqual(self.read_databases(), {'default'})
+
+    def test_reads_stick_to_primary_after_write(self):
+        '''Test a user reads from the primary right after writing'''
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.read_databases(), {None})
+
+    def test_header_forces_primary(self):
+        '''Test clients can ask for a read from the primary'''
+        self.assertEqual(self.read_databases(HTTP_X_READ_PRIMARY='1'), {None})
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA])
+class ReplicaConnectionTests(TransactionTestCase):
+    '''Test recipe API reads run on the replica connection'''
+    # TestCase keeps its writes in an open transaction on the primary,
+    # which a second connection to the test database cannot see.
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com', 'test@123'
+        )
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reads_run_on_replica(self):
+        '''Test listing tags queries the replica and not the primary'''
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]['name'], 'Vegan')
+        self.assertTrue(replica.captured_queries)
+        self.assertFalse(primary.captured_queries)
@@ -0,0 +1,361 @@
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import CharField, Value
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.models import Tag, Ingredient, Recipe, normalize_name
+
+from recipe import cache, counts, search
+from recipe.fields import MAX_PK
+from recipe.serializers import RecipeBulkItemSerializer, RecipeAttrBulkItemSerializer
+from recipe.signals import batch_delete, touch_recipes
+
+
+BATCH_SIZE = 500
+RELATIONS = (('tags', Tag), ('ingredients', Ingredient))
+
+
+def get_items(data):
+    '''Return the list of items in a bulk payload'''
+    if not isinstance(data, list):
+        raise serializers.ValidationError(
+            {'non_field_errors': ['Expected a list of items.']}
+        )
+    if not data:
+        raise serializers.ValidationError(
+            {'non_field_errors': ['Expected at least one item.']}
+        )
+    if len(data) > settings.BULK_MAX_ITEMS:
+        raise serializers.ValidationError(
+            {'non_field_errors': [
+                f'Ensure there are no more than {settings.BULK_MAX_ITEMS} items.'
+            ]}
+        )
+    return data
+
+
+def get_ids(data):
+    '''Return the ids listed in a bulk delete payload'''
+    field = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_PK),
+        allow_empty=False,
+        max_length=settings.BULK_MAX_ITEMS
+    )
+    if not isinstance(data, dict):
+        data = {}
+    try:
+        return field.run_validation(data.get('ids', serializers.empty))
+    except serializers.ValidationError as exc:
+        raise serializers.ValidationError({'ids': exc.detail})
+
+
+def validate_items(serializer_class, items, partial=False):
+    '''Validate every item of a batch in one pass
+
+    Returns the validated data, with None for failed items, and a dict of
+    field errors keyed by item index.
+    '''
+    validated, errors = [], {}
+    seen_ids = set()
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item, partial=partial)
+        if not serializer.is_valid():
+            validated.append(None)
+            errors[index] = dict(serializer.errors)
+            continue
+
+        data = serializer.validated_data
+        if partial and 'id' not in data:
+            errors[index] = {'id': ['This field is required.']}
+        elif partial and data['id'] in seen_ids:
+            errors[index] = {'id': ['Duplicate id in batch.']}
+        seen_ids.add(data.get('id'))
+        validated.append(None if index in errors else data)
+
+    return validated, errors
+
+
+class BulkError(Exception):
+    '''Raised when any item of a batch fails validation'''
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = [
+            {'index': index, 'errors': errors[index]}
+            for index in sorted(errors)
+        ]
+
+
+def raise_for_errors(errors):
+    '''Reject the whole batch if any item failed'''
+    if errors:
+        raise BulkError(errors)
+
+
+def check_related(user, validated, errors):
+    '''Check every related id in the batch belongs to `user`
+
+    All tag and ingredient ids referenced anywhere in the batch are
+    resolved together in a single UNION query.
+    '''
+    requested = {relation: set() for relation, _ in RELATIONS}
+    for item in filter(None, validated):
+        for relation, _ in RELATIONS:
+            requested[relation].update(item.get(relation, ()))
+
+    querysets = [
+        model.objects.filter(user=user, pk__in=requested[relation]).annotate(
+            relation=Value(relation, output_field=CharField())
+        ).values_list('relation', 'pk')
+        for relation, model in RELATIONS
+        if requested[relation]
+    ]
+    owned = {relation: set() for relation, _ in RELATIONS}
+    if querysets:
+        rows = querysets[0].union(*querysets[1:], all=True)
+        for relation, pk in rows:
+            owned[relation].add(pk)
+
+    for index, item in enumerate(validated):
+        if item is None:
+            continue
+        for relation, _ in RELATIONS:
+            missing = [pk for pk in item.get(relation, ()) if pk not in owned[relation]]
+            if missing:
+                errors.setdefault(index, {})[relation] = [
+                    f'Invalid pk "{pk}" - object does not exist.'
+                    for pk in missing
+                ]
+
+
+def bulk_insert(model, objs):
+    '''bulk_create that always leaves primary keys set on `objs`
+
+    Backends that cannot return ids from a multi-row insert fall back to
+    one insert per object so the through rows can still be written.
+    '''
+    connection = connections[router.db_for_write(model)]
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+
+    for obj in objs:
+        obj.save(force_insert=True)
+    return objs
+
+
+def write_relations(pairs, replace=False):
+    '''Insert the through rows for (recipe, item) pairs in bulk
+
+    With `replace`, the existing rows of every recipe whose item names a
+    relation are deleted first, mirroring `set()` on the relation.
+    '''
+    for relation, _ in RELATIONS:
+        field = Recipe._meta.get_field(relation)
+        through = field.remote_field.through
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+
+        recipe_ids, rows = [], []
+        for recipe, item in pairs:
+            if relation not in item:
+                continue
+            recipe_ids.append(recipe.pk)
+            rows.extend(
+                through(**{f'{source}_id': recipe.pk, f'{target}_id': pk})
+                for pk in dict.fromkeys(item[relation])
+            )
+
+        if replace and recipe_ids:
+            through.objects.filter(**{f'{source}_id__in': recipe_ids}).delete()
+        through.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def _recipe_fields(item):
+    return {
+        name: value for name, value in item.items()
+        if name != 'id' and name not in dict(RELATIONS)
+    }
+
+
+def _invalidate_attr_lists(user):
+    '''Through rows written in bulk send no m2m_changed signals'''
+    cache.invalidate(Tag, user.id)
+    cache.invalidate(Ingredient, user.id)
+
+
+def create_recipes(user, data):
+    '''Create a batch of recipes with their tags and ingredients'''
+    validated, errors = validate_items(RecipeBulkItemSerializer, get_items(data))
+    check_related(user, validated, errors)
+    raise_for_errors(errors)
+
+    with transaction.atomic():
+        recipes = bulk_insert(Recipe, [
+            Recipe(user=user, **_recipe_fields(item)) for item in validated
+        ])
+        write_relations(list(zip(recipes, validated)))
+        search.refresh_documents([recipe.pk for recipe in recipes])
+        counts.refresh_counts([recipe.pk for recipe in recipes])
+
+    _invalidate_attr_lists(user)
+    return recipes
+
+
+def update_recipes(user, data):
+    '''Partially update a batch of the user's recipes'''
+    validated, errors = validate_items(
+        RecipeBulkItemSerializer, get_items(data), partial=True
+    )
+    check_related(user, validated, errors)
+    recipes = Recipe.objects.filter(user=user).in_bulk(
+        [item['id'] for item in validated if item is not None]
+    )
+    for index, item in enumerate(validated):
+        if item is not None and item['id'] not in recipes:
+            errors[index] = {'id': ['Not found.']}
+    raise_for_errors(errors)
+
+    now = timezone.now()
+    fields = {'updated_at'}
+    pairs = []
+    for item in validated:
+        recipe = recipes[item['id']]
+        for name, value in _recipe_fields(item).items():
+            setattr(recipe, name, value)
+            fields.add(name)
+        recipe.updated_at = now
+        pairs.append((recipe, item))
+
+    with transaction.atomic():
+        Recipe.objects.bulk_update(
+            [recipe for recipe, _ in pairs], sorted(fields), batch_size=BATCH_SIZE
+        )
+        write_relations(pairs, replace=True)
+        search.refresh_documents([recipe.pk for recipe, _ in pairs])
+        counts.refresh_counts([recipe.pk for recipe, _ in pairs])
+
+    _invalidate_attr_lists(user)
+    return [recipe for recipe, _ in pairs]
+
+
+def get_owned_ids(model, user, data):
+    '''Return the ids of a bulk delete payload, all owned by `user`'''
+    ids = get_ids(data)
+    owned = set(
+        model.objects.filter(user=user, pk__in=ids).values_list('pk', flat=True)
+    )
+    raise_for_errors({
+        index: {'id': ['Not found.']}
+        for index, pk in enumerate(ids) if pk not in owned
+    })
+    return owned
+
+
+def delete_owned(model, user, data):
+    '''Delete a batch of the user's objects by id'''
+    owned = get_owned_ids(model, user, data)
+
+    with transaction.atomic():
+        _, deleted = model.objects.filter(user=user, pk__in=owned).delete()
+
+    return deleted.get(model._meta.label, 0)
+
+
+def create_attrs(model, user, data):
+    '''Create a batch of tags or ingredients
+
+    Names the user already has, or that repeat within the batch, resolve
+    to the existing object instead of a new row.
+    '''
+    validated, errors = validate_items(RecipeAttrBulkItemSerializer, get_items(data))
+    raise_for_errors(errors)
+    keys = [normalize_name(item['name']) for item in validated]
+
+    with transaction.atomic():
+        existing = model.objects.filter(user=user, normalized_name__in=set(keys))
+        by_key = {obj.normalized_name: obj for obj in existing}
+        new = {}
+        for item, key in zip(validated, keys):
+            if key not in by_key and key not in new:
+                new[key] = model(user=user, name=item['name'], normalized_name=key)
+        bulk_insert(model, list(new.values()))
+        by_key.update(new)
+
+    cache.invalidate(model, user.id)
+    return [by_key[key] for key in keys]
+
+
+def check_names_free(model, user, validated, errors):
+    '''Reject renames onto a name another of the user's objects has'''
+    keys = {
+        index: normalize_name(item['name'])
+        for index, item in enumerate(validated)
+        if item is not None and 'name' in item
+    }
+    taken = dict(model.objects.filter(
+        user=user, normalized_name__in=set(keys.values())
+    ).values_list('normalized_name', 'pk'))
+    message = f'{model._meta.verbose_name.capitalize()} with this name already exists.'
+    for index, key in keys.items():
+        pk = validated[index]['id']
+        if taken.setdefault(key, pk) != pk:
+            errors.setdefault(index, {})['name'] = [message]
+
+
+def update_attrs(model, relation, user, data):
+    '''Rename a batch of tags or ingredients'''
+    validated, errors = validate_items(
+        RecipeAttrBulkItemSerializer, get_items(data), partial=True
+    )
+    objs = model.objects.filter(user=user).in_bulk(
+        [item['id'] for item in validated if item is not None]
+    )
+    for index, item in enumerate(validated):
+        if item is not None and item['id'] not in objs:
+            errors[index] = {'id': ['Not found.']}
+    check_names_free(model, user, validated, errors)
+    raise_for_errors(errors)
+
+    for item in validated:
+        if 'name' in item:
+            obj = objs[item['id']]
+            obj.name = item['name']
+            obj.normalized_name = normalize_name(item['name'])
+
+    field = Recipe._meta.get_field(relation)
+    with transaction.atomic():
+        model.objects.bulk_update(
+            objs.values(), ['name', 'normalized_name'], batch_size=BATCH_SIZE
+        )
+        touch_recipes(field.remote_field.through.objects.filter(
+            **{f'{field.m2m_reverse_field_name()}_id__in': list(objs)}
+        ).values(f'{field.m2m_field_name()}_id'))
+
+    cache.invalidate(model, user.id)
+    return list(objs.values())
+
+
+def delete_attrs(model, relation, user, data):
+    '''Delete a batch of tags or ingredients
+
+    The per-row delete signals would cost several queries per object, so
+    they are skipped and the affected recipes are collected once and
+    touched together. The delete itself still cascades as usual.
+    '''
+    owned = get_owned_ids(model, user, data)
+    field = Recipe._meta.get_field(relation)
+    links = field.remote_field.through.objects.filter(
+        **{f'{field.m2m_reverse_field_name()}_id__in': owned}
+    )
+
+    with transaction.atomic():
+        recipe_ids = list(
+            links.values_list(f'{field.m2m_field_name()}_id', flat=True).distinct()
+        )
+        with batch_delete():
+            _, deleted = model.objects.filter(pk__in=owned).delete()
+        touch_recipes(recipe_ids)
+
+    cache.invalidate(model, user.id)
+    return deleted.get(model._meta.label, 0)
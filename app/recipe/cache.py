@@ -0,0 +1,67 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import quote_etag
+
+
+def _cache():
+    return caches[settings.RECIPE_ATTR_CACHE]
+
+
+def _generation_key(model, user_id):
+    return f'recipe-attr:{model._meta.model_name}:{user_id}:token'
+
+
+def get_generation(model, user_id):
+    '''Return the current generation token for a user's rows
+
+    Every cached list of `model` for the user is keyed on the generation
+    token, so bumping it invalidates all of them at once whatever query
+    params they were built for.
+    '''
+    key = _generation_key(model, user_id)
+    generation = _cache().get(key)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        # add() keeps a generation set concurrently by another worker.
+        if not _cache().add(key, generation, settings.RECIPE_ATTR_CACHE_TIMEOUT):
+            generation = _cache().get(key, generation)
+
+    return generation
+
+
+def invalidate(model, user_id):
+    '''Start a new generation for the user's rows of `model`'''
+    _cache().set(
+        _generation_key(model, user_id),
+        uuid.uuid4().hex,
+        settings.RECIPE_ATTR_CACHE_TIMEOUT
+    )
+
+
+def list_etag(generation, params):
+    '''Return a quoted ETag for a list built from `params`'''
+    digest = hashlib.sha1(generation.encode())
+    for name in sorted(params):
+        for value in params.getlist(name):
+            digest.update(f'&{name}={value}'.encode())
+
+    return quote_etag(digest.hexdigest())
+
+
+def list_key(model, user_id, etag):
+    return f'recipe-attr:{model._meta.model_name}:{user_id}:list:{etag}'
+
+
+def get_list(model, user_id, etag):
+    return _cache().get(list_key(model, user_id, etag))
+
+
+def set_list(model, user_id, etag, data):
+    _cache().set(
+        list_key(model, user_id, etag),
+        data,
+        settings.RECIPE_ATTR_CACHE_TIMEOUT
+    )
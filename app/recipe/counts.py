@@ -0,0 +1,42 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Recipe
+
+
+# Recipe relation -> column holding its size
+COUNT_FIELDS = {'ingredients': 'ingredient_count', 'tags': 'tag_count'}
+
+
+def relation_count(relation):
+    '''Return an expression counting a recipe's through rows for `relation`'''
+    field = Recipe._meta.get_field(relation)
+    source = f'{field.m2m_field_name()}_id'
+    rows = field.remote_field.through.objects.filter(
+        **{source: OuterRef('pk')}
+    ).order_by().values(source).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def count_updates():
+    '''Return update() keyword arguments recounting every relation'''
+    return {
+        column: relation_count(relation)
+        for relation, column in COUNT_FIELDS.items()
+    }
+
+
+def refresh_counts(recipe_ids):
+    '''Recount the relations of the given recipes in a single UPDATE
+
+    For writers that add through rows in bulk, which sends no m2m_changed
+    signal. `recipe_ids` may be a list or a queryset of primary keys.
+    '''
+    return Recipe.objects.filter(pk__in=recipe_ids).update(**count_updates())
+
+
+def set_counts(recipe, data):
+    '''Mirror recounts on an in-memory recipe from the relations in `data`'''
+    for relation, column in COUNT_FIELDS.items():
+        if relation in data:
+            setattr(recipe, column, len(set(data[relation])))
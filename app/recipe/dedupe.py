@@ -0,0 +1,90 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from core.models import Recipe, normalize_name
+
+from recipe import cache
+from recipe.signals import touch_recipes
+
+
+BATCH_SIZE = 500
+
+
+def merge_into(relation, target_pk, duplicate_pks):
+    '''Point the recipes using any of `duplicate_pks` at `target_pk` instead
+
+    The duplicates' through rows are removed, so the caller can delete
+    them without any cascade. Returns the ids of the affected recipes.
+    '''
+    field = Recipe._meta.get_field(relation)
+    through = field.remote_field.through
+    source = f'{field.m2m_field_name()}_id'
+    target = f'{field.m2m_reverse_field_name()}_id'
+
+    duplicates = through.objects.filter(**{f'{target}__in': duplicate_pks})
+    recipe_ids = set(duplicates.values_list(source, flat=True))
+    linked = set(through.objects.filter(
+        **{target: target_pk, f'{source}__in': recipe_ids}
+    ).values_list(source, flat=True))
+    through.objects.bulk_create(
+        [through(**{source: pk, target: target_pk})
+         for pk in sorted(recipe_ids - linked)],
+        batch_size=BATCH_SIZE
+    )
+    duplicates.delete()
+    return recipe_ids
+
+
+def merge_batch(model, relation, after_pk, batch_size):
+    '''Normalize the next batch of legacy rows, merging duplicate names
+
+    Legacy rows are those saved before `normalized_name` existed, taken in
+    primary key order after `after_pk`. Each name is kept on the user's
+    row that already has it normalized, or else on its oldest legacy row,
+    and the other rows are merged into that one. Returns the last primary
+    key handled, None once there are no rows left, and the number of rows
+    merged away.
+    '''
+    rows = list(
+        model.objects.filter(normalized_name='', pk__gt=after_pk)
+        .order_by('pk').values_list('pk', 'user_id', 'name')[:batch_size]
+    )
+    if not rows:
+        return None, 0
+
+    groups = defaultdict(list)
+    for pk, user_id, name in rows:
+        key = normalize_name(name)
+        # Names of nothing but whitespace cannot be normalized.
+        if key:
+            groups[user_id, key].append(pk)
+
+    with transaction.atomic():
+        targets = {}
+        normalized = model.objects.filter(
+            user_id__in={user_id for user_id, _ in groups},
+            normalized_name__in={key for _, key in groups}
+        ).values_list('pk', 'user_id', 'normalized_name')
+        for pk, user_id, key in normalized:
+            if (user_id, key) in groups:
+                targets[user_id, key] = pk
+
+        keep, merged, users, recipe_ids = [], [], set(), set()
+        for (user_id, key), pks in groups.items():
+            if (user_id, key) not in targets:
+                keep.append(model(pk=pks[0], normalized_name=key))
+                targets[user_id, key] = pks.pop(0)
+            if pks:
+                recipe_ids |= merge_into(relation, targets[user_id, key], pks)
+                merged.extend(pks)
+                users.add(user_id)
+
+        model.objects.filter(pk__in=merged).delete()
+        model.objects.bulk_update(keep, ['normalized_name'], batch_size=BATCH_SIZE)
+        if recipe_ids:
+            touch_recipes(list(recipe_ids))
+
+    for user_id in users:
+        cache.invalidate(model, user_id)
+    return rows[-1][0], len(merged)
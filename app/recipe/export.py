@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from core.models import Recipe
+
+
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'recipes.ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'recipes.csv'),
+}
+COLUMNS = ('id', 'title', 'time_minutes', 'price', 'link')
+RELATIONS = (('tags', 'tag'), ('ingredients', 'ingredient'))
+RELATION_NAMES = tuple(name for name, _ in RELATIONS)
+HEADER = COLUMNS + RELATION_NAMES
+# Tag and ingredient names inside one CSV cell
+CSV_NAME_SEPARATOR = ';'
+
+
+def format_param(params):
+    '''Return the export format from the query params, ndjson by default'''
+    # Not `format`, which DRF already uses to pick a renderer.
+    name = params.get('export_format', 'ndjson')
+    if name not in FORMATS:
+        raise serializers.ValidationError(
+            {'export_format': [f'Choose one of: {", ".join(FORMATS)}.']}
+        )
+    return name
+
+
+def _related_names(database, recipe_ids):
+    '''Return {relation: {recipe id: [name, ...]}} for one chunk'''
+    related = {}
+    for name, target in RELATIONS:
+        through = Recipe._meta.get_field(name).remote_field.through
+        rows = through.objects.using(database).filter(
+            recipe_id__in=recipe_ids
+        ).order_by(f'{target}_id').values_list('recipe_id', f'{target}__name')
+        by_recipe = defaultdict(list)
+        for recipe_id, label in rows:
+            by_recipe[recipe_id].append(label)
+        related[name] = by_recipe
+    return related
+
+
+def iter_recipes(queryset, chunk_size):
+    '''Yield the recipes of `queryset` as dicts, `chunk_size` at a time
+
+    Rows come from a server-side cursor where the database supports one.
+    Tag and ingredient names are looked up once per chunk, from the same
+    database as the rows, so only one chunk is ever held in memory.
+    '''
+    database = queryset.db
+    rows = queryset.order_by('id').values_list(*COLUMNS).iterator(
+        chunk_size=chunk_size
+    )
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield from _with_related(database, chunk)
+            chunk = []
+    if chunk:
+        yield from _with_related(database, chunk)
+
+
+def _with_related(database, chunk):
+    related = _related_names(database, [row[0] for row in chunk])
+    for row in chunk:
+        recipe = dict(zip(COLUMNS, row))
+        recipe['price'] = str(recipe['price'])
+        for name in RELATION_NAMES:
+            recipe[name] = related[name].get(recipe['id'], [])
+        yield recipe
+
+
+def ndjson_lines(recipes):
+    '''Yield one encoded JSON document per recipe'''
+    for recipe in recipes:
+        yield json.dumps(
+            recipe, ensure_ascii=False, separators=(',', ':')
+        ).encode() + b'\n'
+
+
+def csv_lines(recipes):
+    '''Yield a header row and one encoded CSV row per recipe'''
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value.encode()
+
+    yield line(HEADER)
+    for recipe in recipes:
+        yield line([
+            CSV_NAME_SEPARATOR.join(recipe[name]) if name in RELATION_NAMES
+            else recipe[name]
+            for name in HEADER
+        ])
+
+
+ENCODERS = {'ndjson': ndjson_lines, 'csv': csv_lines}
+
+
+def export_lines(queryset, export_format, chunk_size):
+    '''Return an iterator over the encoded export of `queryset`
+
+    The database is chosen now: the response is streamed after the view
+    returns, when the request's replica routing no longer applies.
+    '''
+    queryset = queryset.using(queryset.db)
+    return ENCODERS[export_format](iter_recipes(queryset, chunk_size))
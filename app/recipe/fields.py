@@ -0,0 +1,147 @@
+import warnings
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+
+from recipe.uploads import HEADER_SIZE, sniff_format
+
+
+# Larger ids overflow the database's integer types instead of not matching
+MAX_PK = 2 ** 63 - 1
+
+
+class UserOwnedManyRelatedField(ManyRelatedField):
+    '''Resolve a list of primary keys with a single IN query'''
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        pks = [child.to_pk(item) for item in data]
+        objects = child.resolve(pks)
+        missing = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+        if missing:
+            raise serializers.ValidationError([
+                child.error_messages['does_not_exist'].format(pk_value=pk)
+                for pk in missing
+            ])
+
+        return [objects[pk] for pk in pks]
+
+
+class UserOwnedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    '''Primary key field limited to objects owned by the requesting user
+
+    With `many=True` all ids in the payload are resolved together, and the
+    objects are remembered on the request so later fields and serializers
+    handling the same request do not fetch them again.
+    '''
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return UserOwnedManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return queryset.none()
+        return queryset.filter(user=user)
+
+    def to_pk(self, data):
+        '''Coerce one submitted id to the model's primary key type'''
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if isinstance(pk, int) and abs(pk) > MAX_PK:
+            self.fail('does_not_exist', pk_value=data)
+        return pk
+
+    def resolve(self, pks):
+        '''Return a {pk: object} map of the owned objects among `pks`'''
+        request = self.context.get('request')
+        queryset = self.get_queryset()
+        cache = {}
+        if request is not None:
+            if not hasattr(request, '_owned_related_cache'):
+                request._owned_related_cache = {}
+            cache = request._owned_related_cache.setdefault(
+                queryset.model._meta.label, {}
+            )
+
+        wanted = [pk for pk in dict.fromkeys(pks) if pk not in cache]
+        if wanted:
+            found = queryset.filter(pk__in=wanted).in_bulk()
+            for pk in wanted:
+                cache[pk] = found.get(pk)
+
+        return {pk: cache[pk] for pk in pks if cache.get(pk) is not None}
+
+    def to_internal_value(self, data):
+        pk = self.to_pk(data)
+        objects = self.resolve([pk])
+        if pk not in objects:
+            self.fail('does_not_exist', pk_value=data)
+        return objects[pk]
+
+
+class BoundedImageField(serializers.FileField):
+    '''Image upload validated from its header without decoding pixels
+
+    The magic bytes must name an accepted format and Pillow only parses
+    the header to read the dimensions, so oversized files and
+    decompression bombs are rejected before any pixel data is inflated.
+    '''
+    default_error_messages = {
+        'invalid_image': 'Upload a valid image. The file you uploaded was '
+                         'either not an image or a corrupted image.',
+        'file_too_large': 'Ensure the image is at most {max_size} bytes.',
+        'too_many_pixels': 'Ensure the image has at most {max_pixels} pixels.',
+    }
+
+    def to_internal_value(self, data):
+        upload = super().to_internal_value(data)
+
+        max_size = settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE
+        if upload.size > max_size:
+            self.fail('file_too_large', max_size=max_size)
+
+        upload.seek(0)
+        header_format = sniff_format(upload.read(HEADER_SIZE))
+        upload.seek(0)
+        if header_format is None:
+            self.fail('invalid_image')
+
+        max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', Image.DecompressionBombWarning)
+                image = Image.open(upload)
+                width, height = image.size
+        except (Image.DecompressionBombWarning, Image.DecompressionBombError):
+            self.fail('too_many_pixels', max_pixels=max_pixels)
+        except Exception:
+            self.fail('invalid_image')
+        finally:
+            upload.seek(0)
+
+        if image.format != header_format:
+            self.fail('invalid_image')
+        if width * height > max_pixels:
+            self.fail('too_many_pixels', max_pixels=max_pixels)
+
+        return upload
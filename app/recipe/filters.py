@@ -0,0 +1,144 @@
+import re
+
+from django.db.models import Count, Exists, OuterRef, Q
+from rest_framework import serializers
+
+from core.models import Recipe
+
+
+MAX_FILTER_IDS = 100
+# ASCII digits only, and few enough to fit any database integer column
+ID_RE = re.compile(r'\d{1,18}', re.ASCII)
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_MODES = (MATCH_ANY, MATCH_ALL)
+
+# Query params filtering a recipe column by range, with their parsers
+RANGE_FIELDS = {
+    'time_minutes': serializers.IntegerField(),
+    'price': serializers.DecimalField(max_digits=5, decimal_places=2),
+}
+RANGE_LOOKUPS = ('gte', 'lte')
+ORDERING_FIELDS = ('id', 'title', 'time_minutes', 'price')
+
+
+def param_to_ints(value, param):
+    '''Parse a comma separated list of ids from a query param
+
+    Malformed or oversized lists raise a validation error, which the
+    api reports as a 400 before any query is built.
+    '''
+    # A valid id is at most 18 digits, so anything longer than the cap
+    # allows is rejected without splitting it.
+    if len(value) > MAX_FILTER_IDS * 19:
+        raise serializers.ValidationError(
+            {param: f'Ensure there are no more than {MAX_FILTER_IDS} ids.'}
+        )
+
+    parts = value.split(',')
+    if len(parts) > MAX_FILTER_IDS:
+        raise serializers.ValidationError(
+            {param: f'Ensure there are no more than {MAX_FILTER_IDS} ids.'}
+        )
+    if not all(ID_RE.fullmatch(part.strip()) for part in parts):
+        raise serializers.ValidationError(
+            {param: 'Expected a comma separated list of ids.'}
+        )
+
+    return sorted({int(part) for part in parts})
+
+
+def match_mode(params):
+    '''Return the requested match mode, defaulting to any'''
+    match = params.get('match', MATCH_ANY)
+    if match not in MATCH_MODES:
+        raise serializers.ValidationError(
+            {'match': f'Expected one of: {", ".join(MATCH_MODES)}.'}
+        )
+    return match
+
+
+def related_filter(relation, ids, match=MATCH_ANY):
+    '''Return a condition selecting recipes related to `ids`
+
+    Both modes are answered from the through table in a subquery, so the
+    outer recipe query gains no joins and never returns a row twice.
+    `any` is an EXISTS semi-join; `all` keeps the recipes whose matching
+    through rows cover every requested id.
+    '''
+    field = Recipe._meta.get_field(relation)
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    rows = field.remote_field.through.objects.filter(
+        **{f'{target}__in': ids}
+    )
+
+    if match == MATCH_ALL:
+        covering = rows.values(source).annotate(
+            matched=Count(target)
+        ).filter(matched=len(ids)).values(source)
+        return Q(pk__in=covering)
+
+    return Exists(rows.filter(**{source: OuterRef('pk')}))
+
+
+def range_filters(params):
+    '''Return the ORM lookups for the range params in the request'''
+    lookups = {}
+    for name, field in RANGE_FIELDS.items():
+        for lookup in RANGE_LOOKUPS:
+            param = f'{name}__{lookup}'
+            if param not in params:
+                continue
+            try:
+                lookups[param] = field.run_validation(params[param])
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError({param: exc.detail})
+    return lookups
+
+
+def ordering_param(params):
+    '''Parse the `ordering` param into a unique ordering, or None
+
+    Only whitelisted columns are accepted. The id is appended as a tie
+    breaker in the direction of the first field, so the ordering stays a
+    unique key for keyset pagination and matches the composite indexes.
+    '''
+    value = params.get('ordering', '')
+    parts = [part.strip() for part in value.split(',') if part.strip()]
+    if not parts:
+        return None
+
+    names = [part.lstrip('-') for part in parts]
+    if (len(parts) > len(ORDERING_FIELDS) or len(set(names)) != len(names)
+            or any(name not in ORDERING_FIELDS for name in names)):
+        raise serializers.ValidationError({
+            'ordering': 'Expected distinct fields from: '
+                        f'{", ".join(ORDERING_FIELDS)}.'
+        })
+
+    if 'id' not in names:
+        parts.append('-id' if parts[0].startswith('-') else 'id')
+    return tuple(parts)
+
+
+def fields_param(params, allowed):
+    '''Return the fields named by the `fields` param, or None for all'''
+    value = params.get('fields')
+    if value is None:
+        return None
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in allowed]
+    if not fields or unknown:
+        raise serializers.ValidationError(
+            {'fields': f'Expected a comma separated list of: {", ".join(allowed)}.'}
+        )
+    return tuple(dict.fromkeys(fields))
+
+
+def flag_param(params, name):
+    '''Return whether the 0/1 param `name` is set, defaulting to off'''
+    value = params.get(name, '0')
+    if value not in ('0', '1'):
+        raise serializers.ValidationError({name: 'Expected 0 or 1.'})
+    return value == '1'
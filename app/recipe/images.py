@@ -0,0 +1,112 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.models import Recipe
+
+
+logger = logging.getLogger(__name__)
+
+FORMAT_EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp', 'PNG': 'png'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    '''Return the worker pool shared by all image jobs in this process'''
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-image'
+            )
+    return _executor
+
+
+def schedule_processing(recipe_id):
+    '''Build the recipe's image variants off the request thread
+
+    The job is only submitted once the surrounding transaction commits, so
+    the worker always sees the new image.
+    '''
+    transaction.on_commit(
+        lambda: get_executor().submit(_run_job, recipe_id)
+    )
+
+
+def _run_job(recipe_id):
+    try:
+        process_recipe_image(recipe_id)
+    except Exception:
+        logger.exception('Failed to process image for recipe %s', recipe_id)
+    finally:
+        # Worker threads own their connections, so release them here.
+        close_old_connections()
+
+
+def _save_kwargs(image_format):
+    if image_format == 'JPEG':
+        return {'quality': 82, 'optimize': True, 'progressive': True}
+    elif image_format == 'WEBP':
+        return {'quality': 80, 'method': 4}
+    return {'optimize': True}
+
+
+def render_variant(image, size, image_format):
+    '''Return the encoded bytes of `image` resized to fit within `size`'''
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    buffer = BytesIO()
+    variant.save(buffer, format=image_format, **_save_kwargs(image_format))
+    return buffer.getvalue()
+
+
+def process_recipe_image(recipe_id):
+    '''Generate and record every configured variant of a recipe image'''
+    recipe = Recipe.objects.only('id', 'image').get(pk=recipe_id)
+    if not recipe.image:
+        return {}
+
+    original = recipe.image.name
+    with recipe.image.open('rb') as image_file:
+        image = Image.open(image_file)
+        image.load()
+
+    # Pillow only gained exif_transpose in 6.0.
+    exif_transpose = getattr(ImageOps, 'exif_transpose', None)
+    if exif_transpose is not None:
+        image = exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    Image.init()
+    storage = recipe.image.storage
+    base = os.path.splitext(original)[0]
+    variants = {}
+    for label, spec in settings.RECIPE_IMAGE_VARIANTS.items():
+        image_format = spec['format']
+        if image_format not in Image.SAVE:
+            logger.warning('Pillow cannot encode %s, skipping %s', image_format, label)
+            continue
+
+        content = render_variant(image, spec['size'], image_format)
+        name = f'{base}_{label}.{FORMAT_EXTENSIONS[image_format]}'
+        variants[label] = storage.save(name, ContentFile(content))
+
+    # Record the variants on every recipe still using this file; uploads of
+    # identical bytes share it. A recipe whose image was replaced meanwhile
+    # is left alone.
+    Recipe.objects.filter(image=original).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    return variants
@@ -0,0 +1,175 @@
+import csv
+import json
+
+from django.db import transaction
+
+from core.models import Tag, Ingredient, Recipe, normalize_name
+
+from recipe import bulk, cache, counts, export, search
+from recipe.serializers import RecipeImportItemSerializer
+
+
+RELATIONS = (('tags', Tag), ('ingredients', Ingredient))
+
+
+def read_ndjson(lines):
+    '''Yield (line number, error, item) for each non-blank NDJSON line'''
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as exc:
+            yield number, {'non_field_errors': [f'Invalid JSON: {exc}']}, None
+            continue
+        if not isinstance(item, dict):
+            yield number, {'non_field_errors': ['Expected an object.']}, None
+            continue
+        yield number, None, item
+
+
+def read_csv(lines):
+    '''Yield (line number, error, item) for each row of a CSV export'''
+    reader = csv.DictReader(lines)
+    for row in reader:
+        item = {
+            name: value for name, value in row.items()
+            if name is not None and value is not None
+        }
+        for name in export.RELATION_NAMES:
+            if name in item:
+                item[name] = [
+                    label for label in item[name].split(export.CSV_NAME_SEPARATOR)
+                    if label.strip()
+                ]
+        yield reader.line_num, None, item
+
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+class NameResolver:
+    '''Map one user's tag or ingredient names to ids, creating missing ones
+
+    Names match case and whitespace insensitively. Names already seen are
+    answered from memory. The rest are looked up, and created if absent,
+    in one batch per chunk.
+    '''
+
+    def __init__(self, model, user):
+        self.model = model
+        self.user = user
+        self.ids = {}
+        self.created = 0
+
+    def resolve(self, names):
+        '''Make sure every name in `names` has an id'''
+        missing = {}
+        for name in names:
+            # The first spelling of a new name is the one created.
+            missing.setdefault(normalize_name(name), name)
+        for key in self.ids.keys() & missing.keys():
+            del missing[key]
+        if not missing:
+            return
+        self.ids.update(self.model.objects.filter(
+            user=self.user, normalized_name__in=missing
+        ).values_list('normalized_name', 'id'))
+        new = [
+            self.model(user=self.user, name=name, normalized_name=key)
+            for key, name in missing.items() if key not in self.ids
+        ]
+        if new:
+            bulk.bulk_insert(self.model, new)
+            self.ids.update((obj.normalized_name, obj.pk) for obj in new)
+            self.created += len(new)
+
+    def id_for(self, name):
+        return self.ids[normalize_name(name)]
+
+
+class ImportResult:
+    '''Running totals of one import'''
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.errors = 0
+
+
+class RecipeImporter:
+    '''Import recipes for one user in chunked transactions
+
+    Rows are validated one at a time and only one chunk of valid rows is
+    held in memory, so the input can be arbitrarily long. `on_error` is
+    called with the line number and field errors of every rejected row,
+    `on_progress` with the running ImportResult after every chunk.
+    '''
+
+    def __init__(self, user, chunk_size, on_error=None, on_progress=None):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.resolvers = {
+            relation: NameResolver(model, user) for relation, model in RELATIONS
+        }
+        self.result = ImportResult()
+
+    def run(self, rows):
+        '''Import (line number, error, item) rows from one of READERS'''
+        chunk = []
+        for number, error, item in rows:
+            self.result.rows += 1
+            if error is None:
+                serializer = RecipeImportItemSerializer(data=item)
+                if serializer.is_valid():
+                    chunk.append(serializer.validated_data)
+                else:
+                    error = dict(serializer.errors)
+            if error is not None:
+                self.result.errors += 1
+                if self.on_error:
+                    self.on_error(number, error)
+            if len(chunk) == self.chunk_size:
+                self.write(chunk)
+                chunk = []
+        if chunk:
+            self.write(chunk)
+
+        # Through rows written in bulk send no m2m_changed, so assigned_only
+        # lists go stale even when every name already existed.
+        if self.result.imported:
+            cache.invalidate(Tag, self.user.id)
+            cache.invalidate(Ingredient, self.user.id)
+        return self.result
+
+    def write(self, chunk):
+        '''Insert one chunk of validated items and their relations'''
+        with transaction.atomic():
+            for relation, resolver in self.resolvers.items():
+                resolver.resolve(
+                    name for item in chunk for name in item.get(relation, ())
+                )
+            recipes = bulk.bulk_insert(Recipe, [
+                Recipe(user=self.user, **{
+                    name: value for name, value in item.items()
+                    if name not in self.resolvers
+                })
+                for item in chunk
+            ])
+            bulk.write_relations([
+                (recipe, {
+                    relation: [
+                        resolver.id_for(name) for name in item.get(relation, ())
+                    ]
+                    for relation, resolver in self.resolvers.items()
+                })
+                for recipe, item in zip(recipes, chunk)
+            ])
+            search.refresh_documents([recipe.pk for recipe in recipes])
+            counts.refresh_counts([recipe.pk for recipe in recipes])
+
+        self.result.imported += len(recipes)
+        if self.on_progress:
+            self.on_progress(self.result)
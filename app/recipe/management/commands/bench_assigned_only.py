@@ -0,0 +1,59 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
+
+from core.benchmark import BenchmarkCommand
+from core.models import Tag, Recipe
+
+
+class Command(BenchmarkCommand):
+    '''Compare the JOIN+DISTINCT and EXISTS plans for assigned_only tags'''
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--tags', type=int, default=10000)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--tags-per-recipe', type=int, default=5)
+
+    def setup(self, **options):
+        self.user = get_user_model().objects.create_user(
+            'bench-assigned-only@example.com', 'bench-password'
+        )
+        Tag.objects.bulk_create(
+            Tag(user=self.user, name=f'tag{i}') for i in range(options['tags'])
+        )
+        Recipe.objects.bulk_create(
+            Recipe(user=self.user, title=f'recipe{i}', time_minutes=10, price=5)
+            for i in range(options['recipes'])
+        )
+
+        tag_ids = list(
+            Tag.objects.filter(user=self.user).values_list('id', flat=True)
+        )
+        recipe_ids = Recipe.objects.filter(
+            user=self.user
+        ).values_list('id', flat=True)
+        through = Recipe.tags.through
+        per_recipe = min(options['tags_per_recipe'], len(tag_ids))
+        through.objects.bulk_create(
+            through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in random.sample(tag_ids, per_recipe)
+        )
+
+    def run(self, **options):
+        base = Tag.objects.filter(user=self.user)
+        join_distinct = base.filter(
+            recipe__isnull=False
+        ).order_by('-name', 'id').distinct()
+        semi_join = base.filter(
+            Exists(Recipe.tags.through.objects.filter(tag_id=OuterRef('pk')))
+        ).order_by('-name', 'id')
+
+        for label, queryset in (
+            ('join + distinct', join_distinct),
+            ('exists', semi_join),
+        ):
+            self.stdout.write(f'-- {label} plan\n{queryset.explain()}')
+            self.measure(label, lambda: list(queryset.values_list('id', 'name')))
@@ -0,0 +1,30 @@
+import tracemalloc
+
+from django.conf import settings
+
+from core.models import Recipe
+from recipe import export
+from recipe.management.commands import bench_recipe_serializer
+
+
+class Command(bench_recipe_serializer.Command):
+    '''Time the streaming export and report its peak memory'''
+
+    def stream(self, export_format):
+        queryset = Recipe.objects.filter(user=self.user)
+        size = 0
+        for line in export.export_lines(
+                queryset, export_format, settings.RECIPE_EXPORT_CHUNK_SIZE):
+            size += len(line)
+        return size
+
+    def run(self, **options):
+        for export_format in export.FORMATS:
+            self.measure(export_format, lambda: self.stream(export_format))
+            tracemalloc.start()
+            size = self.stream(export_format)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.stdout.write(
+                f'  {size} bytes streamed, peak {peak / 1e6:.1f} MB allocated'
+            )
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.benchmark import BenchmarkCommand
+from core.models import Ingredient, Recipe, Tag
+from recipe import counts
+from recipe.views import RecipeViewSet
+
+
+class Command(BenchmarkCommand):
+    '''Compare RecipeSerializer with the values() fast path for lists'''
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+
+    def setup(self, **options):
+        self.user = get_user_model().objects.create_user(
+            'bench-serializer@example.com', 'bench-password'
+        )
+        per_recipe = options['tags_per_recipe']
+        Tag.objects.bulk_create(
+            Tag(user=self.user, name=f'tag{i}') for i in range(per_recipe * 10)
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(user=self.user, name=f'ing{i}') for i in range(per_recipe * 10)
+        )
+        Recipe.objects.bulk_create(
+            Recipe(
+                user=self.user, title=f'recipe{i}', time_minutes=i % 90,
+                price=f'{i % 100}.25', link='https://example.com'
+            )
+            for i in range(options['recipes'])
+        )
+        # Look the ids up again, SQLite's bulk_create does not return them.
+        tags = list(Tag.objects.filter(user=self.user))
+        ingredients = list(Ingredient.objects.filter(user=self.user))
+        recipe_ids = Recipe.objects.filter(
+            user=self.user
+        ).values_list('id', flat=True)
+        for relation, objs in (('tags', tags), ('ingredients', ingredients)):
+            through = Recipe._meta.get_field(relation).remote_field.through
+            target = f'{relation[:-1]}_id'
+            through.objects.bulk_create(
+                through(
+                    recipe_id=recipe_id,
+                    **{target: objs[(recipe_id + n) % len(objs)].pk}
+                )
+                for recipe_id in recipe_ids
+                for n in range(per_recipe)
+            )
+        counts.refresh_counts(recipe_ids)
+
+    def render(self, fast_read, params=None):
+        view = RecipeViewSet.as_view({'get': 'list'}, fast_read=fast_read)
+        request = APIRequestFactory().get('/', params, HTTP_HOST='localhost')
+        force_authenticate(request, self.user)
+        return JSONRenderer().render(view(request).data)
+
+    def run(self, **options):
+        if self.render(True) != self.render(False):
+            raise CommandError('fast path output differs from the serializer')
+
+        for label, fast_read in (('serializer', False), ('values fast path', True)):
+            self.measure(label, lambda: self.render(fast_read))
+            self.measure(
+                f'{label}, summary', lambda: self.render(fast_read, {'summary': 1})
+            )
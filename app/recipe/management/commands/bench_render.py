@@ -0,0 +1,59 @@
+import gzip
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core.middleware import brotli
+from core.models import Recipe
+from core.renderers import FastJSONRenderer, orjson
+from recipe.fastpath import RecipeRowSerializer
+from recipe.management.commands import bench_recipe_serializer
+
+
+class Command(bench_recipe_serializer.Command):
+    '''Compare JSON renderers and response compression on a large recipe list'''
+
+    def setup(self, **options):
+        super().setup(**options)
+        serializer = RecipeRowSerializer(detail=True)
+        rows = list(
+            Recipe.objects.filter(user=self.user).order_by('id').values(
+                *serializer.columns()
+            )
+        )
+        self.data = serializer.serialize(rows)
+
+    def throughput(self, label, func, size):
+        best = self.measure(label, func)
+        self.stdout.write(f'  {size / 1e6 / (best / 1000):.1f} MB/s of JSON')
+
+    def run(self, **options):
+        if orjson is None:
+            self.stdout.write('orjson is not installed, the fast renderer falls back')
+        body = JSONRenderer().render(self.data)
+        if FastJSONRenderer().render(self.data) != body:
+            raise CommandError('fast renderer output differs from JSONRenderer')
+        size = len(body)
+        self.stdout.write(f'{len(self.data)} recipes, {size} bytes of JSON')
+
+        self.throughput('JSONRenderer', lambda: JSONRenderer().render(self.data), size)
+        self.throughput(
+            'FastJSONRenderer', lambda: FastJSONRenderer().render(self.data), size
+        )
+
+        level = settings.COMPRESSION_GZIP_LEVEL
+        self.throughput(
+            f'gzip level {level}',
+            lambda: gzip.compress(body, compresslevel=level), size
+        )
+        self.stdout.write(f'  {len(gzip.compress(body, compresslevel=level))} bytes')
+        if brotli is None:
+            self.stdout.write('brotli: skipped (Brotli is not installed)')
+            return
+        quality = settings.COMPRESSION_BROTLI_QUALITY
+        self.throughput(
+            f'brotli quality {quality}',
+            lambda: brotli.compress(body, quality=quality), size
+        )
+        self.stdout.write(f'  {len(brotli.compress(body, quality=quality))} bytes')
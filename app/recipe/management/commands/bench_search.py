@@ -0,0 +1,58 @@
+import random
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.benchmark import BenchmarkCommand
+from core.models import Recipe
+from recipe.search import local_indexes
+from recipe.views import RecipeViewSet
+
+
+WORDS = (
+    'apple bean beef bread butter cake carrot cheese chicken chili '
+    'chocolate coconut corn cream curry egg fish garlic ginger honey '
+    'lamb lemon lentil mushroom noodle onion pasta pepper pork potato '
+    'rice salmon soup spinach steak sugar tofu tomato vanilla yogurt'
+).split()
+
+
+class Command(BenchmarkCommand):
+    '''Time a paginated recipe search for one user with many recipes'''
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--query', default='chocolate rice')
+
+    def setup(self, **options):
+        user = get_user_model().objects.create_user(
+            'bench-search@example.com', 'bench-password'
+        )
+        rng = random.Random(0)
+        recipes = []
+        for i in range(options['recipes']):
+            title = ' '.join(rng.sample(WORDS, 3))
+            recipes.append(Recipe(
+                user=user, title=title, time_minutes=10, price=5,
+                search_document=f'{title} {" ".join(rng.sample(WORDS, 4))}'
+            ))
+        Recipe.objects.bulk_create(recipes, batch_size=1000)
+        self.user = user
+
+    def run(self, **options):
+        view = RecipeViewSet.as_view({'get': 'list'})
+        params = {'search': options['query'], 'page_size': options['page_size']}
+
+        def search():
+            request = APIRequestFactory().get('/', params, HTTP_HOST='localhost')
+            force_authenticate(request, self.user)
+            view(request).render()
+
+        def cold():
+            local_indexes.clear()
+            search()
+
+        self.measure('search, index rebuilt', cold)
+        self.measure('search', search)
@@ -0,0 +1,73 @@
+import json
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe import importer
+
+
+class Command(BaseCommand):
+    '''Import recipes for a user from an NDJSON or CSV file
+
+    The input is read as a stream and written in chunked transactions, so
+    files of any size import in constant memory. Tags and ingredients are
+    matched by name and created when missing. Rejected rows are reported
+    on stderr and skipped; the rest of the file is still imported.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Owner of the imported recipes')
+        parser.add_argument('path', help="File to import, or '-' for stdin")
+        parser.add_argument(
+            '--format', dest='input_format', choices=sorted(importer.READERS),
+            help='Input format, guessed from the file extension by default'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.RECIPE_IMPORT_CHUNK_SIZE,
+            help='Recipes written per transaction'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+
+        path = options['path']
+        input_format = options['input_format']
+        if input_format is None:
+            input_format = 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+        self.start = time.monotonic()
+        recipe_importer = importer.RecipeImporter(
+            user, options['chunk_size'],
+            on_error=self.report_error, on_progress=self.report_progress
+        )
+        if path == '-':
+            result = recipe_importer.run(importer.READERS[input_format](sys.stdin))
+        else:
+            with open(path, encoding='utf-8', newline='') as lines:
+                result = recipe_importer.run(importer.READERS[input_format](lines))
+
+        created = ', '.join(
+            f'{resolver.created} {relation}'
+            for relation, resolver in recipe_importer.resolvers.items()
+        )
+        elapsed = time.monotonic() - self.start
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.imported} of {result.rows} recipes in '
+            f'{elapsed:.2f}s, {result.errors} rejected, created {created}'
+        ))
+
+    def report_error(self, line, errors):
+        self.stderr.write(f'line {line}: {json.dumps(errors)}')
+
+    def report_progress(self, result):
+        elapsed = time.monotonic() - self.start
+        self.stdout.write(
+            f'{result.imported} recipes imported, {result.errors} rejected '
+            f'({result.imported / max(elapsed, 1e-9):.0f}/s)'
+        )
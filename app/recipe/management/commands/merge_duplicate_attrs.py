@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError
+
+from core.models import Tag, Ingredient
+
+from recipe import dedupe
+
+
+MODELS = (('tags', Tag), ('ingredients', Ingredient))
+
+
+class Command(BaseCommand):
+    '''Merge tags and ingredients whose names differ only in case or spacing
+
+    Runs against a live database: each batch is its own short transaction
+    and recipes are repointed at the surviving row before the duplicates
+    are deleted. Safe to interrupt and run again.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Legacy rows handled per transaction'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='Seconds to pause between batches'
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        for relation, model in MODELS:
+            after_pk, merged = 0, 0
+            while True:
+                try:
+                    last_pk, count = dedupe.merge_batch(
+                        model, relation, after_pk, options['batch_size']
+                    )
+                except IntegrityError:
+                    # A row with one of the names was created meanwhile;
+                    # the retry merges into it instead.
+                    continue
+                if last_pk is None:
+                    break
+                merged += count
+                after_pk = last_pk
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+            self.stdout.write(f'{relation}: {merged} duplicates merged')
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(f'Done in {elapsed:.2f}s'))
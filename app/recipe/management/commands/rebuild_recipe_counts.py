@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Recipe
+
+from recipe import counts
+
+
+class Command(BaseCommand):
+    '''Recount the tags and ingredients stored on every recipe
+
+    Recipes are recounted in primary key order, one UPDATE per batch, so
+    the command can run against a live database to repair counters that
+    drifted. Only recipes whose counts were wrong are written, and their
+    updated_at moves so conditional GETs stop answering with the old
+    counts.
+    '''
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Recipes recounted per statement'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='Seconds to pause between batches'
+        )
+
+    def fix(self, recipe_ids):
+        '''Recount the recipes with a wrong count, returning how many'''
+        actual = {
+            f'actual_{column}': counts.relation_count(relation)
+            for relation, column in counts.COUNT_FIELDS.items()
+        }
+        return Recipe.objects.filter(pk__in=recipe_ids).annotate(**actual).exclude(
+            **{column: F(f'actual_{column}') for column in counts.COUNT_FIELDS.values()}
+        ).update(updated_at=timezone.now(), **counts.count_updates())
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        after_pk, recounted, fixed = 0, 0, 0
+        while True:
+            recipe_ids = list(
+                Recipe.objects.filter(pk__gt=after_pk).order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not recipe_ids:
+                break
+            fixed += self.fix(recipe_ids)
+            recounted += len(recipe_ids)
+            after_pk = recipe_ids[-1]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted {recounted} recipes in {elapsed:.2f}s, '
+            f'{fixed} had wrong counts'
+        ))
@@ -0,0 +1,164 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor, CursorPagination, _positive_int, _reverse_ordering
+)
+
+from recipe.fields import MAX_PK
+
+
+class KeysetCursorPagination(CursorPagination):
+    '''Opt-in keyset pagination over the view's full ordering
+
+    Unlike the stock cursor pagination, which positions on the first
+    ordering field and falls back to OFFSET for ties, the cursor stores a
+    value for every ordering field. Pages are fetched with a row comparison
+    on the composite key, so each page costs one index range scan however
+    deep the client has paged. Requests without `cursor` or `page_size`
+    keep getting the full unpaginated list.
+    '''
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ('-id',)
+
+    def get_page_size(self, request):
+        '''Return a page size only when the client opted into paging'''
+        params = request.query_params
+        if self.page_size_query_param in params:
+            try:
+                return _positive_int(
+                    params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except ValueError:
+                return self.page_size
+        if self.cursor_query_param in params:
+            return self.page_size
+
+        return None
+
+    def get_ordering(self, request, queryset, view):
+        '''Use the ordering the view declares or computes for the request'''
+        if hasattr(view, 'get_ordering'):
+            ordering = view.get_ordering()
+        else:
+            ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            _, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(
+                self._after_position(queryset, current_position, reverse)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = list(results[:self.page_size])
+        has_more = len(results) > len(self.page)
+
+        # The key is unique, so the neighbouring cursors are simply the
+        # positions of the first and last rows and never need an offset.
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = current_position is not None
+
+        if not self.page:
+            self.has_next = self.has_previous = False
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _after_position(self, queryset, position, reverse):
+        '''Build the row comparison selecting rows past `position`
+
+        Each value is cleaned by its model or annotation field, so a
+        tampered cursor is rejected as invalid rather than failing inside
+        the query.
+        '''
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            # AutoField skips the null check in clean(), so do it here.
+            if None in values:
+                raise ValueError
+            values = [
+                self._ordering_field(queryset, order).clean(value, None)
+                for order, value in zip(self.ordering, values)
+            ]
+            if any(isinstance(value, int) and abs(value) > MAX_PK
+                   for value in values):
+                raise ValueError
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        for index, order in enumerate(self.ordering):
+            field = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') != reverse else 'gt'
+            branch = Q(**{f'{field}__{lookup}': values[index]})
+            for prev_order, prev_value in zip(self.ordering, values[:index]):
+                branch &= Q(**{prev_order.lstrip('-'): prev_value})
+            condition |= branch
+
+        return condition
+
+    def _ordering_field(self, queryset, order):
+        name = order.lstrip('-')
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field = order.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[field]
+            else:
+                value = getattr(instance, field)
+            values.append(str(value))
+
+        return json.dumps(values, separators=(',', ':'))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
@@ -0,0 +1,197 @@
+import heapq
+import math
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, Count, FloatField, Func, Max, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from rest_framework import serializers
+
+from core.models import Recipe
+
+
+MAX_SEARCH_LENGTH = 200
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def search_param(params):
+    '''Return the search text from the query params, or None'''
+    text = params.get('search', '').strip()
+    if not text:
+        return None
+    if len(text) > MAX_SEARCH_LENGTH:
+        raise serializers.ValidationError(
+            {'search': f'Ensure this has no more than {MAX_SEARCH_LENGTH} characters.'}
+        )
+    return text
+
+
+def refresh_documents(recipe_ids):
+    '''Rebuild the search document of the given recipes
+
+    `recipe_ids` may be a list or a queryset of primary keys. The titles
+    and both relations are read in one query each.
+    '''
+    recipes = list(Recipe.objects.filter(pk__in=recipe_ids).only('id', 'title'))
+    if not recipes:
+        return
+    ids = [recipe.pk for recipe in recipes]
+    names = defaultdict(list)
+    for relation, related in (('ingredients', 'ingredient'), ('tags', 'tag')):
+        through = Recipe._meta.get_field(relation).remote_field.through
+        rows = through.objects.filter(recipe_id__in=ids).values_list(
+            'recipe_id', f'{related}__name'
+        )
+        for recipe_id, name in rows:
+            names[recipe_id].append(name)
+
+    for recipe in recipes:
+        recipe.search_document = ' '.join([recipe.title, *names[recipe.pk]])
+    Recipe.objects.bulk_update(recipes, ['search_document'], batch_size=500)
+
+
+# Postgres: a GIN index on the tsvector expression. DocumentVector's template
+# must match CREATE_INDEX in core migration 0011 for the index to be used.
+
+class DocumentVector(Func):
+    template = "to_tsvector('english'::regconfig, %(expressions)s)"
+
+
+class PlainQuery(Func):
+    template = "plainto_tsquery('english'::regconfig, %(expressions)s)"
+
+
+class Matches(Func):
+    template = '(%(expressions)s)'
+    arg_joiner = ' @@ '
+    output_field = BooleanField()
+
+
+def _search_postgres(queryset, text):
+    vector = DocumentVector('search_document')
+    query = PlainQuery(Value(text))
+    return queryset.filter(Matches(vector, query)).annotate(
+        # Ranks are compared again by the keyset paginator, so use a type
+        # that survives the round trip through the cursor unchanged.
+        rank=Cast(
+            Func(vector, query, function='ts_rank', output_field=FloatField()),
+            FloatField()
+        )
+    )
+
+
+# Other databases: an inverted index kept in process memory
+
+class InvertedIndex:
+    '''Term -> {recipe id: term frequency} postings for one user's recipes'''
+
+    def __init__(self, version, documents):
+        self.version = version
+        self.size = 0
+        self.postings = defaultdict(dict)
+        for recipe_id, document in documents:
+            self.size += 1
+            for term in tokenize(document):
+                postings = self.postings[term]
+                postings[recipe_id] = postings.get(recipe_id, 0) + 1
+
+    def search(self, terms, limit):
+        '''Return {recipe id: tf-idf rank} of the best recipes with every term'''
+        matches = [self.postings.get(term, {}) for term in set(terms)]
+        if not matches or not all(matches):
+            return {}
+        matches.sort(key=len)
+        candidates = set(matches[0]).intersection(*matches[1:])
+
+        def rank(recipe_id):
+            return sum(
+                postings[recipe_id] * math.log(1 + self.size / len(postings))
+                for postings in matches
+            )
+
+        best = heapq.nlargest(
+            limit, candidates, key=lambda recipe_id: (rank(recipe_id), recipe_id)
+        )
+        return {recipe_id: rank(recipe_id) for recipe_id in best}
+
+
+class IndexStore:
+    '''Bounded LRU of per-user inverted indexes'''
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user):
+        '''Return the user's index, rebuilding it if their recipes changed'''
+        recipes = Recipe.objects.filter(user=user)
+        state = recipes.aggregate(count=Count('id'), updated_at=Max('updated_at'))
+        version = (state['count'], state['updated_at'])
+
+        with self._lock:
+            index = self._indexes.get(user.pk)
+            if index is not None and index.version == version:
+                self._indexes.move_to_end(user.pk)
+                return index
+
+        index = InvertedIndex(
+            version, recipes.values_list('id', 'search_document').iterator()
+        )
+        with self._lock:
+            self._indexes[user.pk] = index
+            self._indexes.move_to_end(user.pk)
+            while len(self._indexes) > self.maxsize:
+                self._indexes.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+local_indexes = IndexStore(settings.RECIPE_SEARCH_INDEX_USERS)
+
+
+def _no_matches(queryset):
+    # Still annotated, so ordering by rank stays valid.
+    return queryset.annotate(rank=Value(0.0, output_field=FloatField())).none()
+
+
+def _search_in_process(queryset, user, text):
+    terms = tokenize(text)
+    ranks = local_indexes.get(user).search(
+        terms, settings.RECIPE_SEARCH_MAX_RESULTS
+    )
+    if not ranks:
+        return _no_matches(queryset)
+    # A simple CASE in raw SQL: building a When() per match costs far more
+    # than running the query.
+    qn = connections[queryset.db].ops.quote_name
+    column = f'{qn(Recipe._meta.db_table)}.{qn(Recipe._meta.pk.column)}'
+    whens = ' '.join(['WHEN %s THEN %s'] * len(ranks))
+    params = [value for item in ranks.items() for value in item]
+    return queryset.filter(pk__in=list(ranks)).annotate(
+        rank=RawSQL(f'CASE {column} {whens} END', params, output_field=FloatField())
+    )
+
+
+def search_recipes(queryset, user, text):
+    '''Filter `queryset` to the user's recipes matching `text`
+
+    Every word must appear in the title, an ingredient or a tag. Matches
+    are annotated with a `rank`, higher meaning more relevant.
+    '''
+    if not tokenize(text):
+        return _no_matches(queryset)
+    if connections[queryset.db].vendor == 'postgresql':
+        return _search_postgres(queryset, text)
+    return _search_in_process(queryset, user, text)
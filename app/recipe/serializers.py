@@ -4,6 +4,11 @@ from rest_framework import serializers
 
 from core.models import Tag, Ingredient, Recipe
 
+from recipe import counts
+from recipe.fields import (
+    MAX_PK, BoundedImageField, UserOwnedPrimaryKeyRelatedField
+)
+
 class TagSerializer(serializers.ModelSerializer):
     '''Serializer for Tag object'''
 
@@ -22,23 +27,79 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
         
 
+def image_urls(variants, request=None):
+    '''Map each image variant label to its url'''
+    storage = Recipe._meta.get_field('image').storage
+    images = {}
+    for label, name in variants.items():
+        url = storage.url(name)
+        images[label] = request.build_absolute_uri(url) if request else url
+    return images
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     '''serialize a recipe'''
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserOwnedPrimaryKeyRelatedField(
         many=True,
         queryset = Ingredient.objects.all()
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserOwnedPrimaryKeyRelatedField(
         many=True,
         queryset = Tag.objects.all()
     )
 
+    images = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'title', 'ingredients', 'tags', 'time_minutes', 'price', 'link')
+        fields = (
+            'id', 'title', 'ingredients', 'tags', 'time_minutes', 'price',
+            'link', 'images'
+        )
+        # Output of summary mode: the relations' sizes instead of their ids
+        summary_fields = (
+            'id', 'title', 'ingredient_count', 'tag_count', 'time_minutes',
+            'price', 'link', 'images'
+        )
         read_only_fields = ('id',)
 
+    def __init__(self, *args, **kwargs):
+        '''Accept a `fields` argument limiting the output to those fields
+
+        With `summary=True` the serializer is read-only and renders the
+        counters stored on the recipe, never reading the through tables.
+        '''
+        fields = kwargs.pop('fields', None)
+        self.summary = kwargs.pop('summary', False)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_field_names(self, declared_fields, info):
+        if self.summary:
+            return self.Meta.summary_fields
+        return super().get_field_names(declared_fields, info)
+
+    def create(self, validated_data):
+        # The m2m_changed handlers update the counts in the database, but
+        # not on this instance.
+        data = dict(validated_data)
+        recipe = super().create(validated_data)
+        counts.set_counts(recipe, data)
+        return recipe
+
+    def update(self, instance, validated_data):
+        data = dict(validated_data)
+        recipe = super().update(instance, validated_data)
+        counts.set_counts(recipe, data)
+        return recipe
+
+    def get_images(self, obj):
+        '''Return the urls of the resized image variants'''
+        return image_urls(obj.image_variants, self.context.get('request'))
+
 
 class RecipeDetailSerializer(RecipeSerializer):
     '''Serialize a recipe detail'''
@@ -48,9 +109,49 @@ class RecipeDetailSerializer(RecipeSerializer):
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     '''Serializer for uploading images to recipes'''
+    image = BoundedImageField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'image')
         read_only_fields = ('id',)
-        
\ No newline at end of file
+
+
+class RecipeBulkItemSerializer(serializers.Serializer):
+    '''Validate one item of a bulk recipe write without touching the db
+
+    Related ids are only checked for shape here; ownership of the whole
+    batch is resolved afterwards in a single query.
+    '''
+    id = serializers.IntegerField(min_value=1, max_value=MAX_PK, required=False)
+    title = serializers.CharField(max_length=255)
+    time_minutes = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=5, decimal_places=2)
+    link = serializers.CharField(max_length=255, allow_blank=True, required=False)
+    tags = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_PK),
+        required=False
+    )
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_PK),
+        required=False
+    )
+
+
+class RecipeImportItemSerializer(RecipeBulkItemSerializer):
+    '''Validate one imported recipe, naming its tags and ingredients'''
+    # Imported rows always become new recipes.
+    id = None
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=255), required=False
+    )
+    ingredients = serializers.ListField(
+        child=serializers.CharField(max_length=255), required=False
+    )
+
+
+class RecipeAttrBulkItemSerializer(serializers.Serializer):
+    '''Validate one item of a bulk tag or ingredient write'''
+    id = serializers.IntegerField(min_value=1, max_value=MAX_PK, required=False)
+    name = serializers.CharField(max_length=255)
+
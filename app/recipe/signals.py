@@ -0,0 +1,132 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Tag, Ingredient, Recipe
+
+from recipe import cache, counts, search
+
+
+# Set while recipe.bulk deletes tags or ingredients, which does the work of
+# the per-row delete handlers once for the whole batch instead.
+_batch_delete = ContextVar('batch_delete', default=False)
+
+
+@contextmanager
+def batch_delete():
+    '''Skip the per-row tag and ingredient delete handlers inside the block'''
+    token = _batch_delete.set(True)
+    try:
+        yield
+    finally:
+        _batch_delete.reset(token)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_attr_lists(sender, instance, **kwargs):
+    '''Drop cached lists when a tag or ingredient is written'''
+    if _batch_delete.get():
+        return
+    cache.invalidate(sender, instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_tag_lists(sender, instance, action, **kwargs):
+    '''Drop cached tag lists when recipe assignments change'''
+    if action.startswith('post_'):
+        cache.invalidate(Tag, instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_ingredient_lists(sender, instance, action, **kwargs):
+    '''Drop cached ingredient lists when recipe assignments change'''
+    if action.startswith('post_'):
+        cache.invalidate(Ingredient, instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_attr_lists(sender, instance, **kwargs):
+    '''Deleting a recipe removes its assignments without m2m_changed'''
+    cache.invalidate(Tag, instance.user_id)
+    cache.invalidate(Ingredient, instance.user_id)
+
+
+def touch_recipes(recipe_ids):
+    '''Rebuild search documents and bump updated_at so readers see the change
+
+    The relation counts are recounted in the same UPDATE. updated_at moves
+    last because the in-process search index and the conditional GETs
+    treat it as the version of the documents.
+    '''
+    search.refresh_documents(recipe_ids)
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        updated_at=timezone.now(), **counts.count_updates()
+    )
+
+
+@receiver(pre_save, sender=Recipe)
+def fill_search_document(sender, instance, update_fields=None, **kwargs):
+    '''Keep the search document in step with the title'''
+    if update_fields is not None and 'title' not in update_fields:
+        return
+    names = []
+    if instance.pk is not None:
+        names = [
+            *instance.ingredients.values_list('name', flat=True),
+            *instance.tags.values_list('name', flat=True),
+        ]
+    instance.search_document = ' '.join([instance.title, *names])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_changed_recipes(sender, instance, action, reverse, pk_set, **kwargs):
+    '''Recipes whose tags or ingredients changed are modified too'''
+    if action in ('post_add', 'post_remove'):
+        touch_recipes(pk_set if reverse else [instance.pk])
+    elif action == 'pre_clear' and reverse:
+        # The affected recipes are only known before the rows are gone.
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        touch_recipes(
+            getattr(instance, '_cleared_recipe_ids', []) if reverse
+            else [instance.pk]
+        )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def touch_recipes_using(sender, instance, created=False, **kwargs):
+    '''Renaming a tag or ingredient changes recipe details'''
+    if not created:
+        touch_recipes(instance.recipe_set.values('pk'))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_recipes_using(sender, instance, **kwargs):
+    '''The recipes of a deleted tag are only known before the rows go'''
+    if _batch_delete.get():
+        return
+    instance._deleted_from_recipe_ids = list(
+        instance.recipe_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def touch_recipes_deleted_from(sender, instance, **kwargs):
+    '''Deleting a tag or ingredient changes recipe details'''
+    if _batch_delete.get():
+        return
+    touch_recipes(getattr(instance, '_deleted_from_recipe_ids', []))
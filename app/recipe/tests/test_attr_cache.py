@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+
+
+TAG_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class AttrListCacheTests(TestCase):
+    '''Test caching of tag and ingredient lists'''
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+
+    def test_cached_list_skips_database(self):
+        '''test a repeated list is answered from the cache'''
+        first = self.client.get(TAG_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(TAG_URL)
+
+        self.assertEqual(first.data, second.data)
+
+    def test_create_invalidates(self):
+        '''test creating a tag through the api shows up in the next list'''
+        self.client.get(TAG_URL)
+
+        self.client.post(TAG_URL, {'name': 'Dessert'})
+        res = self.client.get(TAG_URL)
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_recipe_assignment_invalidates(self):
+        '''test assigning a tag to a recipe refreshes assigned_only lists'''
+        res = self.client.get(TAG_URL, {'assigned_only': 1})
+        self.assertEqual(len(res.data), 0)
+
+        recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=5
+        )
+        recipe.tags.add(self.tag)
+        res = self.client.get(TAG_URL, {'assigned_only': 1})
+        self.assertEqual(len(res.data), 1)
+
+        recipe.delete()
+        res = self.client.get(TAG_URL, {'assigned_only': 1})
+        self.assertEqual(len(res.data), 0)
+
+    def test_delete_invalidates(self):
+        '''test deleting an ingredient refreshes the ingredient list'''
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        self.assertEqual(len(self.client.get(INGREDIENTS_URL).data), 1)
+
+        ingredient.delete()
+
+        self.assertEqual(len(self.client.get(INGREDIENTS_URL).data), 0)
+
+    def test_cache_is_per_user(self):
+        '''test users never see each other's cached lists'''
+        self.client.get(TAG_URL)
+        user2 = get_user_model().objects.create_user(
+            'other@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(user2)
+
+        res = self.client.get(TAG_URL)
+
+        self.assertEqual(res.data, [])
+
+    def test_new_tag_within_the_same_second(self):
+        '''test If-Modified-Since cannot hide a tag created the same second'''
+        self.client.get(TAG_URL)
+
+        res = self.client.post(TAG_URL, {'name': 'Dessert'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.get(
+            TAG_URL, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('Dessert', [tag['name'] for tag in res.data])
+
+    def test_conditional_get(self):
+        '''test revalidating an unchanged list returns 304'''
+        res = self.client.get(TAG_URL)
+        etag = res['ETag']
+        self.assertNotIn('Last-Modified', res)
+
+        res = self.client.get(TAG_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Tag.objects.create(user=self.user, name='Dessert')
+        res = self.client.get(TAG_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
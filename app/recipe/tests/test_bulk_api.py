@@ -0,0 +1,257 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPE_BULK_URL = reverse('recipe:recipe-bulk')
+TAG_BULK_URL = reverse('recipe:tag-bulk')
+
+
+def recipe_payload(**params):
+    '''return a valid bulk recipe item'''
+    defaults = {'title': 'Soup', 'time_minutes': 10, 'price': '5.00'}
+    defaults.update(params)
+    return defaults
+
+
+class BulkRecipeApiTests(TestCase):
+    '''Test the bulk recipe endpoints'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+
+    def test_bulk_create(self):
+        '''test creating recipes with relations in one request'''
+        payload = [
+            recipe_payload(title='One', tags=[self.tag.id]),
+            recipe_payload(title='Two', ingredients=[self.ingredient.id]),
+        ]
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        one, two = [Recipe.objects.get(id=pk) for pk in res.data['ids']]
+        self.assertEqual(one.title, 'One')
+        self.assertEqual(list(one.tags.all()), [self.tag])
+        self.assertEqual(list(two.ingredients.all()), [self.ingredient])
+
+    def test_bulk_create_reports_errors_per_item(self):
+        '''test an invalid batch writes nothing and reports each item'''
+        user2 = get_user_model().objects.create_user(
+            'other@test.com',
+            'test@123'
+        )
+        foreign_tag = Tag.objects.create(user=user2, name='Theirs')
+        payload = [
+            recipe_payload(),
+            recipe_payload(time_minutes='soon'),
+            recipe_payload(tags=[self.tag.id, foreign_tag.id]),
+        ]
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = res.data['errors']
+        self.assertEqual([error['index'] for error in errors], [1, 2])
+        self.assertIn('time_minutes', errors[0]['errors'])
+        self.assertIn('tags', errors[1]['errors'])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_checks_relations_in_one_query(self):
+        '''test related ids are resolved together for the whole batch'''
+        payload = [
+            recipe_payload(tags=[self.tag.id], ingredients=[self.ingredient.id])
+            for _ in range(3)
+        ]
+        payload.append(recipe_payload(tags=[self.tag.id + 100]))
+
+        with self.assertNumQueries(1):
+            res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update(self):
+        '''test partially updating several recipes'''
+        one = Recipe.objects.create(
+            user=self.user, title='One', time_minutes=5, price=5
+        )
+        two = Recipe.objects.create(
+            user=self.user, title='Two', time_minutes=5, price=5
+        )
+        one.tags.add(self.tag)
+        payload = [
+            {'id': one.id, 'tags': []},
+            {'id': two.id, 'price': '7.50', 'tags': [self.tag.id]},
+        ]
+
+        res = self.client.patch(RECIPE_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        one.refresh_from_db()
+        two.refresh_from_db()
+        self.assertEqual(one.title, 'One')
+        self.assertEqual(one.tags.count(), 0)
+        self.assertEqual(two.price, Decimal('7.50'))
+        self.assertEqual(list(two.tags.all()), [self.tag])
+
+    def test_bulk_update_other_users_recipe(self):
+        '''test updating a recipe of another user is rejected'''
+        user2 = get_user_model().objects.create_user(
+            'other@test.com',
+            'test@123'
+        )
+        recipe = Recipe.objects.create(
+            user=user2, title='Theirs', time_minutes=5, price=5
+        )
+
+        res = self.client.patch(
+            RECIPE_BULK_URL, [{'id': recipe.id, 'title': 'Mine'}], format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Theirs')
+
+    def test_bulk_delete(self):
+        '''test deleting several recipes by id'''
+        recipes = [
+            Recipe.objects.create(
+                user=self.user, title=f'r{i}', time_minutes=5, price=5
+            )
+            for i in range(3)
+        ]
+
+        res = self.client.delete(
+            RECIPE_BULK_URL,
+            {'ids': [recipes[0].id, recipes[1].id]},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['deleted'], 2)
+        self.assertEqual(list(Recipe.objects.all()), [recipes[2]])
+
+    def test_bulk_oversized_ids_rejected(self):
+        '''test ids too large for the database are rejected, not a 500'''
+        huge = 2 ** 70
+        requests = [
+            (self.client.post, RECIPE_BULK_URL, [recipe_payload(tags=[huge])]),
+            (self.client.patch, RECIPE_BULK_URL, [recipe_payload(id=huge)]),
+            (self.client.delete, RECIPE_BULK_URL, {'ids': [huge]}),
+            (self.client.patch, TAG_BULK_URL, [{'id': huge, 'name': 'Vegan'}]),
+        ]
+        for method, url, payload in requests:
+            res = method(url, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, payload)
+
+    def test_bulk_payload_must_be_list(self):
+        '''test a non-list payload is rejected'''
+        res = self.client.post(RECIPE_BULK_URL, recipe_payload(), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkTagApiTests(TestCase):
+    '''Test the bulk tag endpoints'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_rename_delete(self):
+        '''test the tag bulk lifecycle'''
+        res = self.client.post(
+            TAG_BULK_URL, [{'name': 'Vegan'}, {'name': 'Quick'}], format='json'
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        vegan_id, quick_id = res.data['ids']
+
+        res = self.client.patch(
+            TAG_BULK_URL, [{'id': vegan_id, 'name': 'Plant based'}], format='json'
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Tag.objects.get(id=vegan_id).name, 'Plant based')
+
+        res = self.client.delete(TAG_BULK_URL, {'ids': [quick_id]}, format='json')
+        self.assertEqual(res.data['deleted'], 1)
+        self.assertEqual(
+            list(Tag.objects.values_list('name', flat=True)), ['Plant based']
+        )
+
+    def test_bulk_create_reuses_existing_names(self):
+        '''test names the user has already resolve to the existing tags'''
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        res = self.client.post(
+            TAG_BULK_URL,
+            [{'name': 'vegan'}, {'name': 'Quick'}, {'name': 'QUICK'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ids = res.data['ids']
+        self.assertEqual(ids[0], vegan.id)
+        self.assertEqual(ids[1], ids[2])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_rename_onto_existing_name(self):
+        '''test renaming a tag to another tag's name is rejected'''
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        quick = Tag.objects.create(user=self.user, name='Quick')
+
+        res = self.client.patch(TAG_BULK_URL, [
+            {'id': quick.id, 'name': 'VEGAN'},
+            {'id': vegan.id, 'name': 'vegan'},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['errors'][0]['index'], 0)
+        self.assertIn('name', res.data['errors'][0]['errors'])
+        self.assertEqual(len(res.data['errors']), 1)
+
+    def delete_tags(self, count):
+        tags = [
+            Tag.objects.create(user=self.user, name=f'{count}-{i}')
+            for i in range(count)
+        ]
+        recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=5
+        )
+        recipe.tags.add(*tags)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.delete(
+                TAG_BULK_URL, {'ids': [tag.id for tag in tags]}, format='json'
+            )
+        self.assertEqual(res.data['deleted'], count)
+        return recipe, len(ctx.captured_queries)
+
+    def test_bulk_delete_tags_in_fixed_queries(self):
+        '''test deleting tags costs the same queries whatever the batch size'''
+        recipe, few = self.delete_tags(2)
+        _, many = self.delete_tags(50)
+
+        self.assertEqual(few, many)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.tag_count, 0)
+        self.assertEqual(recipe.search_document, 'Soup')
+        self.assertFalse(Tag.objects.exists())
@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Ingredient, Tag, Recipe
+
+
+class MergeDuplicateAttrsTests(TestCase):
+    '''Test the merge_duplicate_attrs management command'''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+
+    def legacy(self, model, *names, user=None):
+        '''Rows saved before names were normalized'''
+        model.objects.bulk_create(
+            model(user=user or self.user, name=name) for name in names
+        )
+        return list(model.objects.filter(normalized_name='').order_by('id'))
+
+    def recipe(self, title, tags=(), ingredients=()):
+        recipe = Recipe.objects.create(
+            user=self.user, title=title, time_minutes=5, price=5
+        )
+        recipe.tags.add(*tags)
+        recipe.ingredients.add(*ingredients)
+        return recipe
+
+    def merge(self, batch_size=2):
+        call_command(
+            'merge_duplicate_attrs', batch_size=batch_size, stdout=StringIO()
+        )
+
+    def test_merges_legacy_duplicates(self):
+        '''Test duplicates collapse onto the oldest row, keeping recipes'''
+        vegan, vegan_lower, quick, vegan_spaced = self.legacy(
+            Tag, 'Vegan', 'vegan', 'Quick', ' VEGAN '
+        )
+        both = self.recipe('Both', tags=[vegan, vegan_lower])
+        one = self.recipe('One', tags=[vegan_spaced, quick])
+
+        self.merge()
+
+        self.assertEqual(
+            list(Tag.objects.order_by('id').values_list('id', 'normalized_name')),
+            [(vegan.id, 'vegan'), (quick.id, 'quick')]
+        )
+        self.assertEqual(list(both.tags.all()), [vegan])
+        self.assertCountEqual(one.tags.all(), [vegan, quick])
+
+    def test_merges_into_normalized_row(self):
+        '''Test legacy rows merge into a row created after the migration'''
+        salt, = self.legacy(Ingredient, 'salt')
+        recipe = self.recipe('Soup', ingredients=[salt])
+        current = Ingredient.objects.create(user=self.user, name='Salt')
+
+        self.merge()
+
+        self.assertEqual(list(Ingredient.objects.all()), [current])
+        self.assertEqual(list(recipe.ingredients.all()), [current])
+        recipe.refresh_from_db()
+        self.assertIn('Salt', recipe.search_document)
+
+    def test_users_kept_apart(self):
+        '''Test the same name of different users is not merged'''
+        other = get_user_model().objects.create_user('other@test.com', 'pass')
+        self.legacy(Tag, 'Vegan')
+        self.legacy(Tag, 'vegan', user=other)
+
+        self.merge()
+
+        self.assertEqual(Tag.objects.filter(normalized_name='vegan').count(), 2)
@@ -0,0 +1,124 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.test import APIClient
+
+from core.models import Tag, Recipe
+
+
+TAG_URL = reverse('recipe:tag-list')
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+class KeysetPaginationTests(TestCase):
+    '''Test opt-in cursor pagination of the recipe api'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _walk(self, url, params):
+        '''follow next links and return every page'''
+        pages = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data)
+            if not res.data['next']:
+                return pages
+            res = self.client.get(res.data['next'])
+
+    def test_unpaginated_by_default(self):
+        '''test clients that do not opt in get a plain list'''
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.get(TAG_URL)
+
+        self.assertIsInstance(res.data, list)
+
+    def test_tags_paged_with_duplicate_names(self):
+        '''test paging tags whose names tie keeps every row exactly once'''
+        # Only rows from before names were normalized can still tie.
+        Tag.objects.bulk_create(
+            Tag(user=self.user, name=name)
+            for name in ['b', 'a', 'b', 'c', 'b', 'a']
+        )
+
+        pages = self._walk(TAG_URL, {'page_size': 2})
+
+        ids = [tag['id'] for page in pages for tag in page['results']]
+        expected = list(
+            Tag.objects.order_by('-name', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(ids, expected)
+
+    def test_recipes_paged_newest_first(self):
+        '''test walking recipes forward and back'''
+        for i in range(5):
+            Recipe.objects.create(
+                user=self.user, title=f'r{i}', time_minutes=5, price=5
+            )
+
+        pages = self._walk(RECIPE_URL, {'page_size': 2})
+
+        ids = [r['id'] for page in pages for r in page['results']]
+        expected = list(
+            Recipe.objects.order_by('-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+        res = self.client.get(pages[-1]['previous'])
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [r['id'] for r in pages[-2]['results']]
+        )
+
+    def test_page_query_count_independent_of_depth(self):
+        '''test a deep page costs the same queries as the first'''
+        for i in range(6):
+            Recipe.objects.create(
+                user=self.user, title=f'r{i}', time_minutes=5, price=5
+            )
+
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPE_URL, {'page_size': 2})
+        with self.assertNumQueries(4):
+            res = self.client.get(res.data['next'])
+        with self.assertNumQueries(4):
+            self.client.get(res.data['next'])
+
+    def test_invalid_cursor(self):
+        '''test a tampered cursor is rejected'''
+        res = self.client.get(TAG_URL, {'cursor': 'garbage'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor_values(self):
+        '''test cursor values that are not valid for their field are rejected'''
+        paginator = CursorPagination()
+        cases = [
+            ('page_size=1', ['abc']),
+            ('page_size=1', [None]),
+            ('page_size=1', [{'a': 1}]),
+            ('page_size=1', [str(2 ** 70)]),
+            ('page_size=1&ordering=price', ['cheap', '1']),
+            ('page_size=1&ordering=price', ['1.00', 'abc']),
+        ]
+        for query, values in cases:
+            paginator.base_url = f'{RECIPE_URL}?{query}'
+            url = paginator.encode_cursor(Cursor(
+                offset=0, reverse=False, position=json.dumps(values)
+            ))
+            res = self.client.get(url)
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND, values)
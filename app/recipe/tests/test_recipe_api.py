@@ -4,16 +4,20 @@ import os
 
 from PIL import Image
 from django.contrib.auth import get_user_model
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.urls import reverse
 
 from rest_framework import serializers, status
 import rest_framework
-from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
 from core.models import Recipe, Tag, Ingredient
 
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.views import RecipeViewSet
 
 
 RECIPE_URL = reverse('recipe:recipe-list')
@@ -34,6 +38,12 @@ def sample_ingredient(user, name='salt'):
     '''create and return a sample ingredient'''
     return Ingredient.objects.create(user=user, name=name)
 
+def request_for(user):
+    '''return an api request authenticated as user'''
+    request = Request(APIRequestFactory().post(RECIPE_URL))
+    request.user = user
+    return request
+
 def sample_recipe(user, **params):
     '''create and return sample recipe'''
     defaults = {
@@ -293,3 +303,179 @@ class RecipeImageUploadTests(TestCase):
         self.assertIn(serializer1.data, res.data)
         self.assertIn(serializer2.data, res.data)
         self.assertNotIn(serializer3.data, res.data)
+
+
+class RecipeQueryCountTests(TestCase):
+    '''Test the number of queries used by the recipe api'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _create_recipes(self, count, start=0):
+        '''create recipes each having a tag and an ingredient'''
+        for i in range(start, start + count):
+            recipe = sample_recipe(user=self.user, title=f'Recipe{i}')
+            recipe.tags.add(sample_tag(user=self.user, name=f'tag{i}'))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f'ing{i}')
+            )
+
+    def test_list_query_count_is_fixed(self):
+        '''test listing recipes does not query per recipe'''
+        self._create_recipes(1)
+        with self.assertNumQueries(4):
+            self.client.get(RECIPE_URL)
+
+        self._create_recipes(20, start=1)
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data), 21)
+
+    def test_retrieve_query_count_is_fixed(self):
+        '''test retrieving a recipe with many relations'''
+        recipe = sample_recipe(user=self.user)
+        for i in range(10):
+            recipe.tags.add(sample_tag(user=self.user, name=f'tag{i}'))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f'ing{i}')
+            )
+
+        with self.assertNumQueries(4):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(len(res.data['tags']), 10)
+        self.assertEqual(len(res.data['ingredients']), 10)
+
+
+class RecipeFastPathTests(TestCase):
+    '''Test the values() based read path renders like the serializers'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+        shared = sample_tag(user=self.user, name='shared')
+        ingredient = sample_ingredient(user=self.user)
+        for i in range(3):
+            recipe = sample_recipe(
+                user=self.user, title=f'Recipe {i} \u00e9', price='7.5',
+                link='https://example.com',
+                image_variants={'thumbnail': f'uploads/recipe/{i}_thumbnail.jpg'}
+            )
+            recipe.tags.add(sample_tag(user=self.user, name=f'tag{i}'))
+            recipe.tags.add(shared)
+            recipe.ingredients.add(ingredient)
+
+    def assertSameBytes(self, url, params=None):
+        fast = self.client.get(url, params)
+        with patch.object(RecipeViewSet, 'fast_read', False):
+            slow = self.client.get(url, params)
+
+        self.assertEqual(fast.status_code, slow.status_code)
+        self.assertEqual(fast.content, slow.content)
+
+    def test_list_identical(self):
+        '''test the fast list renders the same bytes as the serializer'''
+        self.assertSameBytes(RECIPE_URL)
+        self.assertSameBytes(RECIPE_URL, {'page_size': 2, 'ordering': 'title'})
+        self.assertSameBytes(RECIPE_URL, {'fields': 'price,tags'})
+
+    def test_retrieve_identical(self):
+        '''test the fast detail renders the same bytes as the serializer'''
+        recipe = Recipe.objects.first()
+
+        self.assertSameBytes(detail_url(recipe.id))
+        self.assertSameBytes(detail_url(999999))
+
+
+class RecipeRelatedValidationTests(TestCase):
+    '''Test validation of related ids when writing recipes'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_other_users_tag_rejected(self):
+        '''test a recipe cannot use another user's tag'''
+        user2 = get_user_model().objects.create_user(
+            'other@test.com',
+            'test@123'
+        )
+        tag = sample_tag(user=user2)
+        payload = {
+            'title': 'Title1',
+            'time_minutes': 10,
+            'price': 5.00,
+            'tags': [tag.id]
+        }
+
+        res = self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_oversized_id_rejected(self):
+        '''test an id too large for the database is a bad request'''
+        payload = {
+            'title': 'Title1',
+            'time_minutes': 10,
+            'price': 5.00,
+            'tags': [10 ** 40]
+        }
+
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+
+    def test_all_missing_ids_reported(self):
+        '''test every unknown id is reported at once'''
+        ingredient = sample_ingredient(user=self.user)
+        payload = {
+            'title': 'Title1',
+            'time_minutes': 10,
+            'price': 5.00,
+            'ingredients': [ingredient.id, 9998, 9999]
+        }
+
+        res = self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['ingredients']), 2)
+        self.assertIn('9998', res.data['ingredients'][0])
+        self.assertIn('9999', res.data['ingredients'][1])
+
+    def test_ingredients_resolved_in_one_query(self):
+        '''test validating many ingredients costs a single lookup'''
+        ingredients = [
+            sample_ingredient(user=self.user, name=f'ing{i}') for i in range(20)
+        ]
+        payload = {
+            'title': 'Title1',
+            'time_minutes': 10,
+            'price': '5.00',
+            'ingredients': [ingredient.id for ingredient in ingredients],
+            'tags': [],
+        }
+        serializer = RecipeSerializer(
+            data=payload, context={'request': request_for(self.user)}
+        )
+
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+
+        self.assertEqual(serializer.validated_data['ingredients'], ingredients)
+
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    '''return recipe detail url'''
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RecipeConditionalGetTests(TestCase):
+    '''Test ETag revalidation of the recipe api'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=5
+        )
+
+    def test_unchanged_detail_is_not_modified(self):
+        '''test an unchanged recipe returns 304 without serializing'''
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_changes_within_the_same_second(self):
+        '''test If-Modified-Since cannot hide a change made the same second'''
+        url = detail_url(self.recipe.id)
+        first = self.client.get(url)
+        self.assertFalse(first.has_header('Last-Modified'))
+
+        res = self.client.patch(url, {'title': 'Stew'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'Stew')
+
+    def test_detail_changes_with_tags(self):
+        '''test assigning a tag changes the recipe etag'''
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 1)
+
+    def test_detail_changes_with_tag_rename(self):
+        '''test renaming an assigned tag changes the recipe etag'''
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe.tags.add(tag)
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_unchanged_list_is_not_modified(self):
+        '''test an unchanged recipe list returns 304'''
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.recipe.delete()
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_changes_after_delete(self):
+        '''test If-Modified-Since cannot hide a deleted recipe'''
+        other = Recipe.objects.create(
+            user=self.user, title='Stew', time_minutes=5, price=5
+        )
+        first = self.client.get(RECIPE_URL)
+        self.assertFalse(first.has_header('Last-Modified'))
+
+        other.delete()
+        res = self.client.get(
+            RECIPE_URL, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    def test_missing_recipe_not_found(self):
+        '''test conditional checks leave 404s alone'''
+        res = self.client.get(detail_url(self.recipe.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', res)
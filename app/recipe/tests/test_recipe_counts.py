@@ -0,0 +1,135 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Tag, Recipe
+from recipe.views import RecipeViewSet
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+RECIPE_BULK_URL = reverse('recipe:recipe-bulk')
+
+
+class RecipeCountTests(TestCase):
+    '''Test the tag and ingredient counts stored on recipes'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+        self.tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Vegan', 'Quick', 'Dinner')
+        ]
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=5
+        )
+
+    def assertCounts(self, recipe, tags, ingredients):
+        recipe.refresh_from_db()
+        self.assertEqual((recipe.tag_count, recipe.ingredient_count), (tags, ingredients))
+
+    def test_counts_follow_relation_changes(self):
+        '''Test adding, removing and clearing keeps the counts right'''
+        self.recipe.tags.add(*self.tags)
+        self.recipe.ingredients.add(self.salt)
+        self.assertCounts(self.recipe, 3, 1)
+
+        self.recipe.tags.remove(self.tags[0])
+        self.assertCounts(self.recipe, 2, 1)
+
+        self.salt.recipe_set.clear()
+        self.assertCounts(self.recipe, 2, 0)
+
+        self.tags[1].delete()
+        self.assertCounts(self.recipe, 1, 0)
+
+    def test_counts_from_api_writes(self):
+        '''Test the serializer and bulk write paths set the counts'''
+        res = self.client.post(RECIPE_URL, {
+            'title': 'Stew', 'time_minutes': 60, 'price': '8.00',
+            'tags': [tag.id for tag in self.tags], 'ingredients': [self.salt.id],
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertCounts(Recipe.objects.get(id=res.data['id']), 3, 1)
+
+        res = self.client.post(RECIPE_BULK_URL, [{
+            'title': 'Toast', 'time_minutes': 2, 'price': '1.00',
+            'tags': [self.tags[0].id, self.tags[0].id],
+        }], format='json')
+        toast = Recipe.objects.get(id=res.data['ids'][0])
+        self.assertCounts(toast, 1, 0)
+
+        self.client.patch(RECIPE_BULK_URL, [
+            {'id': toast.id, 'ingredients': [self.salt.id]}
+        ], format='json')
+        self.assertCounts(toast, 1, 1)
+
+    def test_summary_list(self):
+        '''Test summary mode shows counts and skips the through tables'''
+        self.recipe.tags.add(*self.tags[:2])
+
+        # The ETag aggregate and the page, nothing from the through tables
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPE_URL, {'summary': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(res.data[0]),
+            ['id', 'title', 'ingredient_count', 'tag_count', 'time_minutes',
+             'price', 'link', 'images']
+        )
+        self.assertEqual(res.data[0]['tag_count'], 2)
+        self.assertEqual(res.data[0]['ingredient_count'], 0)
+
+        with patch.object(RecipeViewSet, 'fast_read', False):
+            slow = self.client.get(RECIPE_URL, {'summary': 1})
+        self.assertEqual(slow.content, res.content)
+
+    def test_summary_with_fields(self):
+        res = self.client.get(RECIPE_URL, {'summary': 1, 'fields': 'id,tag_count'})
+        self.assertEqual(list(res.data[0]), ['id', 'tag_count'])
+
+        res = self.client.get(RECIPE_URL, {'summary': 'yes'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_command(self):
+        '''Test the rebuild command repairs drifted counts'''
+        self.recipe.tags.add(*self.tags)
+        Recipe.objects.update(tag_count=7, ingredient_count=2)
+        out = StringIO()
+
+        call_command('rebuild_recipe_counts', batch_size=1, stdout=out)
+
+        self.assertCounts(self.recipe, 3, 0)
+        self.assertIn('1 had wrong counts', out.getvalue())
+
+    def test_rebuild_command_changes_etag(self):
+        '''Test repaired recipes are not revalidated with the old counts'''
+        other = Recipe.objects.create(
+            user=self.user, title='Stew', time_minutes=5, price=5
+        )
+        self.recipe.tags.add(*self.tags)
+        Recipe.objects.filter(pk=self.recipe.pk).update(tag_count=7)
+        etag = self.client.get(RECIPE_URL, {'summary': 1})['ETag']
+        other_updated_at = Recipe.objects.get(pk=other.pk).updated_at
+
+        call_command('rebuild_recipe_counts', stdout=StringIO())
+
+        res = self.client.get(RECIPE_URL, {'summary': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        by_id = {row['id']: row for row in res.data}
+        self.assertEqual(by_id[self.recipe.pk]['tag_count'], 3)
+        other.refresh_from_db()
+        self.assertEqual(other.updated_at, other_updated_at)
@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Tag, Recipe
+from recipe import export
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+@override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+class RecipeExportTests(TestCase):
+    '''Test streaming exports of a user's recipes'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.recipes = []
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Soup {i}', time_minutes=i, price='5.50'
+            )
+            if i % 2:
+                recipe.tags.add(self.vegan)
+                recipe.ingredients.add(self.salt)
+            self.recipes.append(recipe)
+
+    def get_body(self, params=None):
+        res = self.client.get(EXPORT_URL, params or {})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        return res, b''.join(res.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        '''Test every recipe is streamed as one JSON line with its names'''
+        other = get_user_model().objects.create_user('other@test.com', 'pass')
+        Recipe.objects.create(user=other, title='Other', time_minutes=1, price=1)
+
+        res, body = self.get_body()
+        lines = [json.loads(line) for line in body.splitlines()]
+
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([line['id'] for line in lines],
+                         [recipe.id for recipe in self.recipes])
+        self.assertEqual(lines[1], {
+            'id': self.recipes[1].id, 'title': 'Soup 1', 'time_minutes': 1,
+            'price': '5.50', 'link': '', 'tags': ['Vegan'],
+            'ingredients': ['Salt'],
+        })
+        self.assertEqual(lines[0]['tags'], [])
+
+    def test_export_csv(self):
+        '''Test the CSV export has a header and one row per recipe'''
+        res, body = self.get_body({'export_format': 'csv'})
+        rows = list(csv.reader(io.StringIO(body)))
+
+        self.assertTrue(res['Content-Type'].startswith('text/csv'))
+        self.assertIn('recipes.csv', res['Content-Disposition'])
+        self.assertEqual(rows[0], list(export.HEADER))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(
+            rows[2],
+            [str(self.recipes[1].id), 'Soup 1', '1', '5.50', '', 'Vegan', 'Salt']
+        )
+
+    def test_export_filters(self):
+        '''Test the export honours the recipe list filters'''
+        _, body = self.get_body({'tags': str(self.vegan.id)})
+        ids = [json.loads(line)['id'] for line in body.splitlines()]
+        self.assertEqual(ids, [self.recipes[1].id, self.recipes[3].id])
+
+    def test_export_invalid_format(self):
+        res = self.client.get(EXPORT_URL, {'export_format': 'xml'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_queries_per_chunk(self):
+        '''Test relations are fetched once per chunk, not per recipe'''
+        res = self.client.get(EXPORT_URL)
+        # Two lookups for each chunk of two after the rows themselves
+        with self.assertNumQueries(1 + 3 * 2):
+            b''.join(res.streaming_content)
+
+    def test_export_uses_request_database(self):
+        '''Test the database is fixed before the response is streamed'''
+        with patch.object(export, 'iter_recipes') as iter_recipes:
+            iter_recipes.return_value = iter([])
+            self.client.get(EXPORT_URL)
+        queryset = iter_recipes.call_args.args[0]
+        # An unpinned queryset would ask the router again while streaming.
+        self.assertEqual(queryset._db, 'default')
@@ -0,0 +1,188 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+from recipe.filters import MAX_FILTER_IDS
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+class RecipeFilterTests(TestCase):
+    '''Test filtering recipes by tags and ingredients'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+
+        self.both = self._recipe('Both', self.vegan, self.quick)
+        self.vegan_only = self._recipe('Vegan only', self.vegan)
+        self.untagged = self._recipe('Untagged')
+        self.both.ingredients.add(self.salt)
+
+    def _recipe(self, title, *tags):
+        recipe = Recipe.objects.create(
+            user=self.user, title=title, time_minutes=10, price=5
+        )
+        recipe.tags.add(*tags)
+        return recipe
+
+    def _ids(self, params):
+        res = self.client.get(RECIPE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in res.data]
+
+    def test_match_any_returns_each_recipe_once(self):
+        '''test a recipe matching several tags is not duplicated'''
+        ids = self._ids({'tags': f'{self.vegan.id},{self.quick.id}'})
+
+        self.assertEqual(ids, [self.vegan_only.id, self.both.id])
+
+    def test_match_all(self):
+        '''test only recipes carrying every tag are returned'''
+        ids = self._ids({
+            'tags': f'{self.vegan.id},{self.quick.id}',
+            'match': 'all',
+        })
+
+        self.assertEqual(ids, [self.both.id])
+
+    def test_tags_and_ingredients_combined(self):
+        '''test tag and ingredient filters both apply'''
+        ids = self._ids({
+            'tags': str(self.vegan.id),
+            'ingredients': str(self.salt.id),
+        })
+
+        self.assertEqual(ids, [self.both.id])
+
+    def test_filter_adds_no_joins(self):
+        '''test the recipe query filters through subqueries only'''
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(RECIPE_URL, {
+                'tags': f'{self.vegan.id},{self.quick.id}',
+                'ingredients': str(self.salt.id),
+                'match': 'all',
+            })
+
+        sql = ctx.captured_queries[0]['sql'].upper()
+        self.assertNotIn('JOIN', sql)
+
+    def test_invalid_ids_rejected(self):
+        '''test malformed id lists are a bad request'''
+        for value in ('1,abc', '1,,2', '-1', '\u00b2', '1,' + '9' * 40):
+            res = self.client.get(RECIPE_URL, {'tags': value})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_too_many_ids_rejected(self):
+        '''test overlong id lists are a bad request'''
+        value = ','.join(str(i) for i in range(MAX_FILTER_IDS + 1))
+
+        res = self.client.get(RECIPE_URL, {'ingredients': value})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_match_rejected(self):
+        '''test an unknown match mode is a bad request'''
+        res = self.client.get(
+            RECIPE_URL, {'tags': str(self.vegan.id), 'match': 'some'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeRangeSortFieldsTests(TestCase):
+    '''Test range filters, ordering and sparse fields on the recipe list'''
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+        self.quick_cheap = self._recipe('Toast', 5, '2.00')
+        self.quick_dear = self._recipe('Caviar', 5, '90.00')
+        self.slow_cheap = self._recipe('Stew', 120, '4.00')
+
+    def _recipe(self, title, time_minutes, price):
+        return Recipe.objects.create(
+            user=self.user, title=title, time_minutes=time_minutes, price=price
+        )
+
+    def _ids(self, params):
+        res = self.client.get(RECIPE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in res.data]
+
+    def test_range_filters(self):
+        '''test filtering on time and price bounds'''
+        ids = self._ids({'time_minutes__lte': 10, 'price__lte': '10'})
+        self.assertEqual(ids, [self.quick_cheap.id])
+
+        ids = self._ids({'price__gte': '3.50'})
+        self.assertCountEqual(ids, [self.quick_dear.id, self.slow_cheap.id])
+
+    def test_invalid_range_rejected(self):
+        '''test a malformed bound is a bad request'''
+        res = self.client.get(RECIPE_URL, {'price__lte': 'cheap'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('price__lte', res.data)
+
+    def test_ordering(self):
+        '''test ordering by whitelisted fields with an id tie breaker'''
+        ids = self._ids({'ordering': 'time_minutes,-price'})
+        self.assertEqual(
+            ids, [self.quick_dear.id, self.quick_cheap.id, self.slow_cheap.id]
+        )
+
+    def test_ordering_paginated(self):
+        '''test keyset pages follow a custom ordering'''
+        res = self.client.get(RECIPE_URL, {'ordering': 'price', 'page_size': 2})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        ids += [
+            recipe['id'] for recipe in self.client.get(res.data['next']).data['results']
+        ]
+
+        self.assertEqual(
+            ids, [self.quick_cheap.id, self.slow_cheap.id, self.quick_dear.id]
+        )
+
+    def test_unknown_ordering_rejected(self):
+        '''test ordering on other columns is refused'''
+        res = self.client.get(RECIPE_URL, {'ordering': 'user__password'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sparse_fields(self):
+        '''test fields= trims the output and the selected columns'''
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(RECIPE_URL, {'fields': 'id,price'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data[0]), {'id', 'price'})
+        select = ctx.captured_queries[-1]['sql']
+        self.assertNotIn('"title"', select)
+        self.assertNotIn('core_recipe_tags', select)
+
+    def test_unknown_field_rejected(self):
+        '''test asking for a field the list does not have is refused'''
+        res = self.client.get(RECIPE_URL, {'fields': 'id,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
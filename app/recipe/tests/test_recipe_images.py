@@ -0,0 +1,198 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+from recipe.images import process_recipe_image
+from recipe.serializers import RecipeSerializer
+
+
+def image_upload_url(recipe_id):
+    '''Return URL for recipe image upload'''
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def sample_image(size=(1200, 900)):
+    '''return an encoded jpeg of the given size'''
+    buffer = BytesIO()
+    Image.new('RGB', size, color='red').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class RecipeImageVariantTests(TestCase):
+    '''Test generating resized recipe images'''
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=5
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_variants_generated_and_recorded(self):
+        '''test each variant is written and fits its bounding box'''
+        self.recipe.image.save('soup.jpg', ContentFile(sample_image()))
+
+        variants = process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, variants)
+        storage = self.recipe.image.storage
+        with storage.open(variants['thumbnail']) as thumbnail:
+            image = Image.open(thumbnail)
+            self.assertEqual(image.format, 'JPEG')
+            self.assertLessEqual(max(image.size), 200)
+        with storage.open(variants['medium_webp']) as medium:
+            image = Image.open(medium)
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (800, 600))
+
+    def test_serializer_exposes_variant_urls(self):
+        '''test the recipe serializer lists a url per variant'''
+        self.recipe.image.save('soup.jpg', ContentFile(sample_image()))
+        process_recipe_image(self.recipe.id)
+        self.recipe.refresh_from_db()
+
+        images = RecipeSerializer(self.recipe).data['images']
+
+        self.assertEqual(
+            images['thumbnail'],
+            f'/media/{self.recipe.image_variants["thumbnail"]}'
+        )
+
+    def test_replaced_image_not_overwritten(self):
+        '''test a stale job does not record variants of an old image'''
+        self.recipe.image.save('soup.jpg', ContentFile(sample_image()))
+        with patch('recipe.images.Recipe.objects.only') as only:
+            only.return_value.get.return_value = self.recipe
+            Recipe.objects.filter(pk=self.recipe.pk).update(image='other.jpg')
+            process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, {})
+
+    @patch('recipe.images.schedule_processing')
+    def test_upload_schedules_processing(self, schedule):
+        '''test uploading an image queues the variant job'''
+        client = APIClient()
+        client.force_authenticate(self.user)
+        upload = ContentFile(sample_image((10, 10)), name='soup.jpg')
+
+        res = client.post(
+            image_upload_url(self.recipe.id), {'image': upload}, format='multipart'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        schedule.assert_called_once_with(self.recipe.id)
+
+
+@override_settings(RECIPE_IMAGE_MAX_UPLOAD_SIZE=4096, RECIPE_IMAGE_MAX_PIXELS=10000)
+class RecipeImageUploadLimitTests(TestCase):
+    '''Test validation and dedupe of recipe image uploads'''
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=5
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _upload(self, content, name='soup.jpg', recipe=None):
+        recipe = recipe or self.recipe
+        with patch('recipe.images.schedule_processing'):
+            return self.client.post(
+                image_upload_url(recipe.id),
+                {'image': ContentFile(content, name=name)},
+                format='multipart'
+            )
+
+    def test_too_many_pixels_rejected(self):
+        '''test an image over the pixel budget is rejected from its header'''
+        res = self._upload(sample_image((200, 200)))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('pixels', str(res.data['image']))
+
+    def test_wrong_magic_bytes_rejected(self):
+        '''test a file that is not an accepted image format is rejected'''
+        res = self._upload(b'%PDF-1.4 not an image', name='soup.jpg')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_oversized_body_rejected_before_parsing(self):
+        '''test an upload far above the size cap is refused with 413'''
+        with patch('recipe.views.UPLOAD_OVERHEAD', 0):
+            res = self._upload(b'\xff\xd8\xff' + b'0' * 8192)
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+
+    def test_identical_upload_reuses_stored_file(self):
+        '''test uploading the same bytes twice writes the file once'''
+        other = Recipe.objects.create(
+            user=self.user, title='Stew', time_minutes=5, price=5
+        )
+        content = sample_image((10, 10))
+        self._upload(content)
+        self.recipe.refresh_from_db()
+
+        res = self._upload(content, recipe=other)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        other.refresh_from_db()
+        self.assertEqual(other.image.name, self.recipe.image.name)
+        self.assertEqual(other.image_sha256, self.recipe.image_sha256)
+
+    def test_identical_upload_gets_variants(self):
+        '''test a deduped upload gets variants while the first job is pending'''
+        other = Recipe.objects.create(
+            user=self.user, title='Stew', time_minutes=5, price=5
+        )
+        content = sample_image((10, 10))
+        self._upload(content)
+
+        with patch('recipe.images.schedule_processing') as schedule:
+            self.client.post(
+                image_upload_url(other.id),
+                {'image': ContentFile(content, name='soup.jpg')},
+                format='multipart'
+            )
+        schedule.assert_called_once_with(other.id)
+
+        # The first recipe's job records its variants on both recipes.
+        variants = process_recipe_image(self.recipe.id)
+        other.refresh_from_db()
+        self.assertTrue(variants)
+        self.assertEqual(other.image_variants, variants)
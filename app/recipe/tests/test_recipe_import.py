@@ -0,0 +1,154 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Tag, Recipe
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class RecipeImportTests(TestCase):
+    '''Test the import_recipes management command'''
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+
+    def write_file(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def import_file(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_recipes', self.user.email, path,
+            stdout=out, stderr=err, **options
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_ndjson(self):
+        '''Test recipes are created with tags and ingredients by name'''
+        Tag.objects.create(user=self.user, name='Vegan')
+        lines = [
+            {'title': 'Soup', 'time_minutes': 10, 'price': '5.50',
+             'tags': ['vegan', 'Quick'], 'ingredients': ['Salt']},
+            {'title': 'Stew', 'time_minutes': 60, 'price': '8.00',
+             'tags': ['VEGAN'], 'ingredients': ['salt', 'Beef']},
+            {'title': 'Toast', 'time_minutes': 2, 'price': '1.00'},
+        ]
+        path = self.write_file(
+            '.ndjson', '\n'.join(json.dumps(line) for line in lines)
+        )
+
+        out, err = self.import_file(path, chunk_size=2)
+
+        self.assertIn('Imported 3 of 3 recipes', out)
+        self.assertEqual(err, '')
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 2)
+        stew = Recipe.objects.get(title='Stew')
+        self.assertEqual(
+            sorted(stew.ingredients.values_list('name', flat=True)),
+            ['Beef', 'Salt']
+        )
+        self.assertEqual(list(stew.tags.values_list('name', flat=True)), ['Vegan'])
+        self.assertIn('Beef', stew.search_document)
+
+    def test_import_reports_row_errors(self):
+        '''Test invalid rows are reported and skipped'''
+        path = self.write_file('.ndjson', '\n'.join([
+            json.dumps({'title': 'Soup', 'time_minutes': 10, 'price': '5.50'}),
+            'not json',
+            json.dumps({'title': 'Stew', 'price': '5.50'}),
+        ]))
+
+        out, err = self.import_file(path)
+
+        self.assertIn('Imported 1 of 3 recipes', out)
+        self.assertIn('line 2:', err)
+        self.assertIn('line 3:', err)
+        self.assertIn('time_minutes', err)
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_import_csv_round_trip(self):
+        '''Test a CSV export imports back into an equal collection'''
+        other = get_user_model().objects.create_user('other@test.com', 'pass')
+        recipe = Recipe.objects.create(
+            user=other, title='Soup, "hot"', time_minutes=10, price='5.50'
+        )
+        recipe.tags.add(Tag.objects.create(user=other, name='Vegan'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=other, name='Salt'),
+            Ingredient.objects.create(user=other, name='Leek'),
+        )
+        client = APIClient()
+        client.force_authenticate(other)
+        res = client.get(EXPORT_URL, {'export_format': 'csv'})
+        path = self.write_file(
+            '.csv', b''.join(res.streaming_content).decode()
+        )
+
+        self.import_file(path)
+
+        imported = Recipe.objects.get(user=self.user)
+        self.assertEqual(imported.title, 'Soup, "hot"')
+        self.assertEqual(
+            sorted(imported.ingredients.values_list('name', flat=True)),
+            ['Leek', 'Salt']
+        )
+
+    def test_import_resolves_names_once(self):
+        '''Test each name is looked up once, not once per recipe'''
+        path = self.write_file('.ndjson', '\n'.join(
+            json.dumps({'title': f'Soup {i}', 'time_minutes': 1, 'price': 1,
+                        'tags': ['Vegan', 'Quick']})
+            for i in range(20)
+        ))
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.import_file(path, chunk_size=5)
+
+        lookups = [
+            query for query in ctx.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "core_tag"' in query['sql']
+        ]
+        self.assertEqual(len(lookups), 1)
+        self.assertEqual(Recipe.objects.filter(tags__name='Vegan').count(), 20)
+
+    def test_import_refreshes_assigned_lists(self):
+        '''Test cached tag lists see recipes using existing tags'''
+        Tag.objects.create(user=self.user, name='Vegan')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        tag_url = reverse('recipe:tag-list')
+        res = client.get(tag_url, {'assigned_only': 1})
+        self.assertEqual(res.data, [])
+
+        path = self.write_file('.ndjson', json.dumps(
+            {'title': 'Soup', 'time_minutes': 1, 'price': 1, 'tags': ['Vegan']}
+        ))
+        self.import_file(path)
+
+        res = client.get(tag_url, {'assigned_only': 1})
+        self.assertEqual([tag['name'] for tag in res.data], ['Vegan'])
+
+    def test_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', 'nobody@test.com', '-')
@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Tag, Recipe
+from recipe.search import local_indexes
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+class RecipeSearchTests(TestCase):
+    '''Test full-text search over recipes'''
+
+    def setUp(self):
+        cache.clear()
+        local_indexes.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'test@123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def create_recipe(self, title, tags=(), ingredients=()):
+        recipe = Recipe.objects.create(
+            user=self.user, title=title, time_minutes=10, price=5
+        )
+        recipe.tags.set([
+            Tag.objects.get_or_create(user=self.user, name=name)[0]
+            for name in tags
+        ])
+        recipe.ingredients.set([
+            Ingredient.objects.get_or_create(user=self.user, name=name)[0]
+            for name in ingredients
+        ])
+        return recipe
+
+    def search(self, text, **params):
+        res = self.client.get(RECIPE_URL, {'search': text, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def ids(self, data):
+        return [recipe['id'] for recipe in data]
+
+    def test_search_titles_tags_and_ingredients(self):
+        '''test every word must match the title, a tag or an ingredient'''
+        curry = self.create_recipe('Thai curry', ['Vegan'], ['Coconut milk'])
+        soup = self.create_recipe('Coconut soup', ['Vegan'])
+        self.create_recipe('Steak', ['Dinner'])
+
+        self.assertEqual(self.ids(self.search('vegan coconut milk')), [curry.pk])
+        self.assertCountEqual(self.ids(self.search('coconut')), [curry.pk, soup.pk])
+        self.assertEqual(self.search('fish'), [])
+
+    def test_results_ranked(self):
+        '''test recipes mentioning the term more often come first'''
+        once = self.create_recipe('Chocolate cake')
+        twice = self.create_recipe('Chocolate chocolate chip', ['Chocolate'])
+
+        self.assertEqual(self.ids(self.search('chocolate')), [twice.pk, once.pk])
+
+    def test_search_only_own_recipes(self):
+        '''test other users' recipes are never matched'''
+        other = get_user_model().objects.create_user('other@test.com', 'test@123')
+        Recipe.objects.create(user=other, title='Pasta', time_minutes=5, price=5)
+
+        self.assertEqual(self.search('pasta'), [])
+
+    def test_renamed_and_deleted_tags_reindexed(self):
+        '''test the index follows tag renames and deletions'''
+        recipe = self.create_recipe('Stew', ['Winter'])
+        self.assertEqual(self.ids(self.search('winter')), [recipe.pk])
+
+        tag = recipe.tags.get()
+        tag.name = 'Autumn'
+        tag.save()
+        self.assertEqual(self.search('winter'), [])
+        self.assertEqual(self.ids(self.search('autumn')), [recipe.pk])
+
+        tag.delete()
+        self.assertEqual(self.search('autumn'), [])
+
+    def test_bulk_created_recipes_searchable(self):
+        '''test recipes created in bulk are indexed with their tags'''
+        tag = Tag.objects.create(user=self.user, name='Brunch')
+        res = self.client.post(BULK_URL, [
+            {'title': 'Pancakes', 'time_minutes': 10, 'price': '2.00',
+             'tags': [tag.pk]},
+        ], format='json')
+
+        self.assertEqual(self.ids(self.search('brunch pancakes')), res.data['ids'])
+
+    def test_search_paginated_by_rank(self):
+        '''test paging through matches keeps rank order without repeats'''
+        recipes = [
+            self.create_recipe(' '.join(['Bean'] * (i % 3 + 1)) + f' dish{i}')
+            for i in range(7)
+        ]
+
+        data = self.search('bean', page_size=3)
+        ids = self.ids(data['results'])
+        while data['next']:
+            data = self.client.get(data['next']).data
+            ids += self.ids(data['results'])
+
+        self.assertCountEqual(ids, [recipe.pk for recipe in recipes])
+        self.assertEqual(ids, self.ids(self.search('bean')))
+
+    def test_search_too_long_rejected(self):
+        '''test overlong search text is a bad request'''
+        res = self.client.get(RECIPE_URL, {'search': 'a' * 201})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -75,6 +77,17 @@ class PrivateTagApiTests(TestCase):
         ).exists()
         self.assertTrue(exists)
 
+    def test_create_tag_duplicate_returns_existing(self):
+        '''Test creating a tag the user has in another case returns it'''
+        tag = Tag.objects.create(user=self.user, name='Comfort food')
+
+        res = self.client.post(TAG_URL, {'name': '  comfort   FOOD '})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['id'], tag.id)
+        self.assertEqual(res.data['name'], 'Comfort food')
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
     def test_create_tag_invalid(self):
         '''Test creating a new tag with invalid payload'''
         payload = {'name' : ''}
@@ -124,4 +137,22 @@ class PrivateTagApiTests(TestCase):
         recipe2.tags.add(tag)
 
         res = self.client.get(TAG_URL, {'assigned_only': 1})
-        self.assertEqual(len(res.data), 1)
\ No newline at end of file
+        self.assertEqual(len(res.data), 1)
+
+    def test_assigned_only_uses_semi_join(self):
+        """Test assigned filtering needs no DISTINCT over a join"""
+        tag = Tag.objects.create(user=self.user, name='Tag1')
+        recipe = Recipe.objects.create(
+            title = 'Recipe1',
+            time_minutes=10,
+            price=5.00,
+            user=self.user
+        )
+        recipe.tags.add(tag)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(TAG_URL, {'assigned_only': 1})
+
+        sql = ctx.captured_queries[-1]['sql'].upper()
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('DISTINCT', sql)
@@ -0,0 +1,64 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+
+
+# Leading bytes of every image format accepted for recipes
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+)
+HEADER_SIZE = 12
+
+
+def sniff_format(header):
+    '''Return the image format named by the file's magic bytes, if any'''
+    for signature, image_format in SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+def file_sha256(upload):
+    '''Return the hex sha256 of an uploaded file, reusing the handler's'''
+    digest = getattr(upload, 'sha256', None)
+    if digest is None:
+        hasher = hashlib.sha256()
+        for chunk in upload.chunks():
+            hasher.update(chunk)
+        digest = hasher.hexdigest()
+        upload.seek(0)
+    return digest
+
+
+class HashingFileUploadHandler(TemporaryFileUploadHandler):
+    '''Stream uploads to a temporary file, hashing and size-capping them
+
+    Every chunk goes straight to disk whatever the upload size, so a burst
+    of concurrent uploads never holds file bodies in worker memory. The
+    file storage later moves the temporary file into place rather than
+    copying it.
+    '''
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE:
+            self.file.close()
+            raise StopUpload(connection_reset=False)
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.sha256 = self.hasher.hexdigest()
+        return upload
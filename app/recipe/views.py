@@ -1,18 +1,56 @@
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Tag, Ingredient, Recipe
+from core.authentication import CachedTokenAuthentication
+from core.mixins import ReplicaReadMixin
+from core.models import Tag, Ingredient, Recipe, normalize_name
+
+from recipe import (
+    bulk, cache, export, fastpath, filters, images, search, serializers
+)
+from recipe.uploads import HashingFileUploadHandler, file_sha256
+
+
+# Room for multipart boundaries and headers around the image itself
+UPLOAD_OVERHEAD = 64 * 1024
+
 
-from recipe import serializers
+def conditional_response(request, etag, last_modified, build):
+    '''Answer a conditional GET with 304 or build the full response
 
+    `build` only runs when the client's validators do not match, so an
+    unchanged resource costs no serialization at all.
+    '''
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = build()
+        if response.status_code != 200:
+            return response
 
-class BaseRecipeAttrViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.CreateModelMixin):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class BaseRecipeAttrViewSet(ReplicaReadMixin, viewsets.GenericViewSet, mixins.ListModelMixin, mixins.CreateModelMixin):
     '''Base viewset'''
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    ordering = ('-name', 'id')
 
     def get_queryset(self):
         '''Return object for current authenticated user only'''
@@ -21,52 +59,344 @@ class BaseRecipeAttrViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixi
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(self._assigned_to_recipe())
+
+        return queryset.filter(user=self.request.user).order_by(*self.ordering)
+
+    def _assigned_to_recipe(self):
+        '''Semi-join against the recipe through table
+
+        EXISTS stops at the first matching row and never multiplies the
+        outer rows, so no DISTINCT is needed on top of it.
+        '''
+        field = Recipe._meta.get_field(self.recipe_relation)
+        through = field.remote_field.through
+        return Exists(
+            through.objects.filter(
+                **{field.m2m_reverse_field_name(): OuterRef('pk')}
+            )
+        )
+
+    def list(self, request, *args, **kwargs):
+        '''List objects from the per-user cache, revalidating with 304s
+
+        Cached lists are dropped by the signal handlers in recipe.signals
+        whenever the user's rows or their recipe assignments change.
+        '''
+        model = self.queryset.model
+        generation = cache.get_generation(model, request.user.id)
+        etag = cache.list_etag(generation, request.query_params)
+
+        def build():
+            data = cache.get_list(model, request.user.id, etag)
+            if data is None:
+                data = super(BaseRecipeAttrViewSet, self).list(
+                    request, *args, **kwargs
+                ).data
+                cache.set_list(model, request.user.id, etag, data)
+            return Response(data)
 
-        return queryset.filter(user=self.request.user).order_by('-name').distinct()
+        # No Last-Modified: two generations started in the same second
+        # would share it, hiding the newer list behind a 304.
+        return conditional_response(request, etag, None, build)
+
+    def create(self, request, *args, **kwargs):
+        '''Create an object, answering 200 with the existing one on duplicates'''
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        created = self.perform_create(serializer)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+            headers=self.get_success_headers(serializer.data)
+        )
 
     def perform_create(self, serializer):
-        '''create new object'''
-        serializer.save(user=self.request.user)
+        '''Create the object unless the user has one by that name already
+
+        Names are compared case and whitespace insensitively. Returns
+        whether a row was inserted.
+        '''
+        model = self.queryset.model
+        lookup = {
+            'user': self.request.user,
+            'normalized_name': normalize_name(serializer.validated_data['name']),
+        }
+        existing = model.objects.filter(**lookup).first()
+        if existing is None:
+            try:
+                with transaction.atomic():
+                    serializer.save(user=self.request.user)
+                return True
+            except IntegrityError:
+                # Another request created it since the lookup.
+                existing = model.objects.get(**lookup)
+        serializer.instance = existing
+        return False
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        '''Create, rename or delete many objects in one transaction'''
+        model = self.queryset.model
+        try:
+            return self._bulk(model, request)
+        except bulk.BulkError as exc:
+            return Response(
+                {'errors': exc.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+    def _bulk(self, model, request):
+        if request.method == 'POST':
+            objs = bulk.create_attrs(model, request.user, request.data)
+            return Response(
+                {'ids': [obj.pk for obj in objs]},
+                status=status.HTTP_201_CREATED
+            )
+        elif request.method == 'PATCH':
+            objs = bulk.update_attrs(
+                model, self.recipe_relation, request.user, request.data
+            )
+            return Response({'ids': [obj.pk for obj in objs]})
+
+        deleted = bulk.delete_attrs(
+            model, self.recipe_relation, request.user, request.data
+        )
+        return Response({'deleted': deleted})
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
     '''Manage tag in the database'''
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    recipe_relation = 'tags'
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     '''Manage Ingredient object in database'''
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    recipe_relation = 'ingredients'
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     '''Manage recipe in database'''
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes  = (IsAuthenticated,)
+    ordering = ('-id',)
+
+    # Columns each read serializer actually renders, so list and retrieve
+    # do not pull the image path or user id they never use.
+    list_fields = (
+        'id', 'title', 'time_minutes', 'price', 'link', 'image_variants'
+    )
+    detail_fields = list_fields
+    # Serve list and retrieve from .values() rows, see recipe.fastpath.
+    # Rows are dicts, so turn this off for object-level permissions.
+    fast_read = True
+    # Model column behind each serializer field that is not a column itself
+    field_columns = {'images': 'image_variants'}
 
-    def _param_to_ints(self, qs):
+    def _param_to_ints(self, qs, param):
         """Helper function to convert list of string to list integer"""
-        return [int(str_id) for str_id in qs.split(',')]  
+        return filters.param_to_ints(qs, param)
 
     def get_queryset(self):
         '''Retrive the recipe for authenticated user'''
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
+        return self._optimize_queryset(self._filtered_queryset())
+
+    def _filtered_queryset(self):
+        '''Return the user's recipes matching the request filters'''
+        # list() and get_queryset() both filter, so search only once.
+        if getattr(self, '_filtered', None) is None:
+            self._filtered = self._build_filtered_queryset()
+        return self._filtered
+
+    def _build_filtered_queryset(self):
+        params = self.request.query_params
         queryset = self.queryset
-        if tags:
-            tag_ids = self._param_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
-        
-        if ingredients:
-            ingredient_ids = self._param_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
-             
-        return queryset.filter(user=self.request.user)
+        for relation in ('tags', 'ingredients'):
+            value = params.get(relation)
+            if value:
+                ids = self._param_to_ints(value, relation)
+                queryset = queryset.filter(
+                    filters.related_filter(relation, ids, filters.match_mode(params))
+                )
+
+        queryset = queryset.filter(
+            user=self.request.user, **filters.range_filters(params)
+        )
+        text = self._search_text()
+        if text:
+            queryset = search.search_recipes(queryset, self.request.user, text)
+
+        return queryset.order_by(*self.get_ordering())
+
+    def _search_text(self):
+        if self.action != 'list':
+            return None
+        return search.search_param(self.request.query_params)
+
+    def get_ordering(self):
+        '''Return the requested ordering, most relevant first when searching'''
+        if self.action == 'list':
+            ordering = filters.ordering_param(self.request.query_params)
+            if ordering:
+                return ordering
+        if self._search_text():
+            return ('-rank', '-id')
+        return self.ordering
+
+    def _summary(self):
+        '''Whether the list shows relation counts instead of related ids'''
+        if self.action != 'list':
+            return False
+        return filters.flag_param(self.request.query_params, 'summary')
+
+    def _sparse_fields(self):
+        '''Return the list fields the client asked for, or None for all'''
+        if self.action != 'list':
+            return None
+        meta = serializers.RecipeSerializer.Meta
+        return filters.fields_param(
+            self.request.query_params,
+            meta.summary_fields if self._summary() else meta.fields
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self._sparse_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        if self._summary():
+            kwargs['summary'] = True
+        return super().get_serializer(*args, **kwargs)
+
+    def _optimize_queryset(self, queryset):
+        '''Pick a query plan for the current action'''
+        if self.action == 'list':
+            fields = self._sparse_fields()
+            if fields is None and self._summary():
+                fields = serializers.RecipeSerializer.Meta.summary_fields
+            return self._optimize_list(queryset, fields)
+        elif self.action == 'retrieve':
+            return queryset.only(*self.detail_fields).prefetch_related(
+                Prefetch(
+                    'tags',
+                    queryset=Tag.objects.only('id', 'name').order_by('id')
+                ),
+                Prefetch(
+                    'ingredients',
+                    queryset=Ingredient.objects.only('id', 'name').order_by('id')
+                ),
+            )
+
+        return queryset
+
+    def _optimize_list(self, queryset, fields):
+        '''Select only the columns and relations behind the listed fields'''
+        if fields is None:
+            columns = set(self.list_fields)
+            relations = ('tags', 'ingredients')
+        else:
+            columns = {
+                self.field_columns.get(name, name) for name in fields
+                if name not in ('tags', 'ingredients')
+            }
+            relations = [name for name in fields if name in ('tags', 'ingredients')]
+        # The paginator reads the ordering columns to build its cursors.
+        columns.update(
+            name.lstrip('-') for name in self.get_ordering()
+            if name.lstrip('-') in filters.ORDERING_FIELDS
+        )
+
+        related_models = {'tags': Tag, 'ingredients': Ingredient}
+        return queryset.only(*columns).prefetch_related(*[
+            Prefetch(
+                name,
+                queryset=related_models[name].objects.only('id').order_by('id')
+            )
+            for name in relations
+        ])
+
+    def list(self, request, *args, **kwargs):
+        '''List recipes, answering unchanged lists with 304'''
+        state = self._filtered_queryset().order_by().aggregate(
+            count=Count('id'), updated_at=Max('updated_at')
+        )
+        digest = hashlib.sha1(
+            f'{request.user.id}:{state["count"]}:{state["updated_at"]}'.encode()
+        )
+        for name in sorted(request.query_params):
+            for value in request.query_params.getlist(name):
+                digest.update(f'&{name}={value}'.encode())
+
+        # No Last-Modified: deleting a recipe leaves the newest updated_at
+        # as it was, so only the ETag, which includes the count, is safe.
+        return conditional_response(
+            request,
+            quote_etag(digest.hexdigest()),
+            None,
+            lambda: self._list(request, *args, **kwargs)
+        )
+
+    def _list(self, request, *args, **kwargs):
+        if not self.fast_read:
+            return super().list(request, *args, **kwargs)
+
+        row_serializer = fastpath.RecipeRowSerializer(
+            self._sparse_fields(), request=request, summary=self._summary()
+        )
+        # The paginator reads the ordering values to build its cursors.
+        columns = row_serializer.columns().union(
+            name.lstrip('-') for name in self.get_ordering()
+        )
+        rows = self._filtered_queryset().values(*columns)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page))
+        return Response(row_serializer.serialize(list(rows)))
+
+    def _retrieve(self, request, *args, **kwargs):
+        if not self.fast_read:
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        row_serializer = fastpath.RecipeRowSerializer(detail=True, request=request)
+        try:
+            row = self._filtered_queryset().filter(
+                **{self.lookup_field: kwargs[lookup]}
+            ).values(*row_serializer.columns()).first()
+        except (TypeError, ValueError):
+            row = None
+        if row is None:
+            raise Http404('No Recipe matches the given query.')
+        return Response(row_serializer.serialize([row])[0])
+
+    def retrieve(self, request, *args, **kwargs):
+        '''Retrieve a recipe, answering an unchanged one with 304'''
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        try:
+            updated_at = self._filtered_queryset().filter(
+                **{self.lookup_field: kwargs[lookup]}
+            ).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            updated_at = None
+
+        def build():
+            return self._retrieve(request, *args, **kwargs)
+
+        if updated_at is None:
+            return build()
+
+        # No Last-Modified: it only has whole seconds, so a change in the
+        # same second as the client's copy would be answered with 304.
+        return conditional_response(
+            request,
+            quote_etag(f'{kwargs[lookup]}-{updated_at.timestamp()}'),
+            None,
+            build
+        )
 
     def get_serializer_class(self):
         '''Return appropriate serializer class'''
@@ -81,24 +411,95 @@ class RecipeViewSet(viewsets.ModelViewSet):
         '''create new recipe'''
         serializer.save(user=self.request.user)
 
-    
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        '''Create, update or delete many recipes in one transaction'''
+        try:
+            return self._bulk(request)
+        except bulk.BulkError as exc:
+            return Response(
+                {'errors': exc.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+    def _bulk(self, request):
+        if request.method == 'POST':
+            recipes = bulk.create_recipes(request.user, request.data)
+            return Response(
+                {'ids': [recipe.pk for recipe in recipes]},
+                status=status.HTTP_201_CREATED
+            )
+        elif request.method == 'PATCH':
+            recipes = bulk.update_recipes(request.user, request.data)
+            return Response({'ids': [recipe.pk for recipe in recipes]})
+
+        deleted = bulk.delete_owned(Recipe, request.user, request.data)
+        return Response({'deleted': deleted})
+
+    @action(methods=['GET'], detail=False, url_path='export', url_name='export')
+    def export_recipes(self, request):
+        '''Stream all of the user's recipes as NDJSON or CSV'''
+        export_format = export.format_param(request.query_params)
+        content_type, filename = export.FORMATS[export_format]
+        response = StreamingHttpResponse(
+            export.export_lines(
+                self._filtered_queryset(), export_format,
+                settings.RECIPE_EXPORT_CHUNK_SIZE
+            ),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         '''Upload an image to a recipe'''
+        content_length = request.META.get('CONTENT_LENGTH') or 0
+        try:
+            too_large = int(content_length) > (
+                settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE + UPLOAD_OVERHEAD
+            )
+        except ValueError:
+            too_large = False
+        if too_large:
+            return Response(
+                {'image': ['Ensure the image is at most '
+                           f'{settings.RECIPE_IMAGE_MAX_UPLOAD_SIZE} bytes.']},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
         recipe = self.get_object()
+        request._request.upload_handlers = [
+            HashingFileUploadHandler(request._request)
+        ]
         serializer = self.get_serializer(
             recipe,
             data=request.data
         )
 
         if serializer.is_valid():
-            serializer.save()
+            digest = file_sha256(serializer.validated_data['image'])
+            duplicate = Recipe.objects.filter(image_sha256=digest).exclude(
+                image=''
+            ).values('image', 'image_variants').first()
+            if duplicate:
+                # Identical bytes are already stored, so point at them.
+                recipe.image = duplicate['image']
+                recipe.image_variants = duplicate['image_variants']
+                recipe.image_sha256 = digest
+                recipe.save()
+                if not recipe.image_variants:
+                    # The first upload's job is pending or failed; this one
+                    # retries it and records the variants on both recipes.
+                    images.schedule_processing(recipe.pk)
+            else:
+                serializer.save(image_variants={}, image_sha256=digest)
+                images.schedule_processing(recipe.pk)
             return Response(
-                serializer.data,
+                self.get_serializer(recipe).data,
                 status=status.HTTP_200_OK
             )
 
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hashers
+from rest_framework.exceptions import Throttled
+from rest_framework.test import APIRequestFactory
+
+from core.benchmark import BenchmarkCommand
+from user.serializers import AuthTokenSerialzer
+from user.throttling import record_login_failure, reset_login_failures
+
+
+EMAIL = 'bench-login@example.com'
+PASSWORD = 'bench-password'
+IP = '192.0.2.1'
+
+
+class Command(BenchmarkCommand):
+    '''Time password verification per hasher and the login serializer'''
+
+    def setup(self, **options):
+        get_user_model().objects.create_user(EMAIL, PASSWORD)
+        self.factory = APIRequestFactory()
+
+    def login(self, password):
+        request = self.factory.post('/', REMOTE_ADDR=IP)
+        serializer = AuthTokenSerialzer(
+            data={'email': EMAIL, 'password': password},
+            context={'request': request}
+        )
+        try:
+            serializer.is_valid()
+        except Throttled:
+            pass
+
+    def run(self, **options):
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except (ImportError, ValueError) as exc:
+                self.stdout.write(f'{hasher.algorithm}: skipped ({exc})')
+                continue
+            self.measure(
+                f'verify {hasher.algorithm}',
+                lambda: hasher.verify(PASSWORD, encoded)
+            )
+
+        def bad_login():
+            reset_login_failures(EMAIL)
+            self.login('wrong-password')
+
+        def blocked_login():
+            self.login('wrong-password')
+
+        self.measure('login ok', lambda: self.login(PASSWORD))
+        self.measure('login bad password', bad_login)
+        for _ in range(100):
+            record_login_failure(EMAIL, IP)
+        self.measure('login rate limited', blocked_login)
+        reset_login_failures(EMAIL)
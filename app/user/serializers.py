@@ -2,6 +2,10 @@ from django.contrib.auth import authenticate, get_user_model
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 
+from user.throttling import (
+    check_login_allowed, client_ip, record_login_failure, reset_login_failures
+)
+
 
 class UserSerializer(serializers.ModelSerializer):
     '''Serializer object for user object'''
@@ -39,17 +43,22 @@ class AuthTokenSerialzer(serializers.Serializer):
         '''Validate and authenticate the user'''
         email = attrs.get('email')
         password = attrs.get('password')
+        request = self.context.get('request')
+        ip = client_ip(request)
 
+        check_login_allowed(email, ip)
         user = authenticate(
-            request=self.context.get('request'),
+            request=request,
             username=email,
             password=password
         )
 
         if not user:
+            record_login_failure(email, ip)
             msg = ('Unable to authenticate with provided creadentials')
             raise serializers.ValidationError(msg, code='authentication')
 
+        reset_login_failures(email)
         attrs['user'] = user
         return attrs
 
@@ -1,8 +1,11 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.forms.fields import EmailField
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.fields import empty
+from unittest.mock import patch
 
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -19,6 +22,7 @@ class PublicUserApiTests(TestCase):
     '''Test user API public'''    
 
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_create_valid_user_success(self):
@@ -101,6 +105,76 @@ class PublicUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+@override_settings(LOGIN_RATE_LIMIT_PER_EMAIL=3, LOGIN_RATE_LIMIT_PER_IP=5)
+class LoginRateLimitTests(TestCase):
+    '''Test that repeated failed logins are throttled'''
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        create_user(email='test@test.com', password='test_pass', name='test_name')
+
+    def test_email_blocked_before_hashing(self):
+        '''Test a blocked email is rejected without checking the password'''
+        for _ in range(3):
+            self.client.post(TOKEN_URL, {'email': 'test@test.com', 'password': 'wrong'})
+
+        with patch('user.serializers.authenticate') as authenticate:
+            res = self.client.post(
+                TOKEN_URL, {'email': 'TEST@test.com', 'password': 'test_pass'}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        authenticate.assert_not_called()
+
+    def test_ip_blocked_across_emails(self):
+        '''Test one address failing with many emails gets blocked'''
+        for i in range(5):
+            self.client.post(TOKEN_URL, {'email': f'u{i}@test.com', 'password': 'x'})
+
+        res = self.client.post(
+            TOKEN_URL, {'email': 'test@test.com', 'password': 'test_pass'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_ip_behind_proxy(self):
+        '''Test clients behind a proxy are counted by their own address'''
+        rest_framework = dict(settings.REST_FRAMEWORK, NUM_PROXIES=1)
+        with self.settings(REST_FRAMEWORK=rest_framework):
+            for i in range(5):
+                self.client.post(
+                    TOKEN_URL, {'email': f'u{i}@test.com', 'password': 'x'},
+                    HTTP_X_FORWARDED_FOR='203.0.113.1'
+                )
+
+            res = self.client.post(
+                TOKEN_URL, {'email': 'test@test.com', 'password': 'test_pass'},
+                HTTP_X_FORWARDED_FOR='203.0.113.2'
+            )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+            res = self.client.post(
+                TOKEN_URL, {'email': 'test@test.com', 'password': 'test_pass'},
+                HTTP_X_FORWARDED_FOR='198.51.100.7, 203.0.113.1'
+            )
+            self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_success_resets_email_failures(self):
+        '''Test a successful login clears the email's failure count'''
+        for _ in range(2):
+            self.client.post(TOKEN_URL, {'email': 'test@test.com', 'password': 'wrong'})
+        self.client.post(TOKEN_URL, {'email': 'test@test.com', 'password': 'test_pass'})
+        for _ in range(2):
+            self.client.post(TOKEN_URL, {'email': 'test@test.com', 'password': 'wrong'})
+
+        res = self.client.post(
+            TOKEN_URL, {'email': 'test@test.com', 'password': 'test_pass'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
 class PrivateUserApiTests(TestCase):
     '''test api request that requires authentication'''
 
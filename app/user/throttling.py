@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+
+def _cache():
+    return caches[settings.LOGIN_RATE_LIMIT_CACHE]
+
+
+def _keys(email, ip):
+    keys = {}
+    if email:
+        keys[f'login-fail:email:{email.strip().lower()}'] = \
+            settings.LOGIN_RATE_LIMIT_PER_EMAIL
+    if ip:
+        keys[f'login-fail:ip:{ip}'] = settings.LOGIN_RATE_LIMIT_PER_IP
+    return keys
+
+
+def client_ip(request):
+    '''Return the address the request came from
+
+    Behind a reverse proxy the address is read from X-Forwarded-For, as
+    configured by the REST_FRAMEWORK NUM_PROXIES setting, so clients do
+    not all share the proxy's address.
+    '''
+    if request is None:
+        return None
+    return BaseThrottle().get_ident(request)
+
+
+def check_login_allowed(email, ip):
+    '''Raise Throttled when the email or address has failed too often
+
+    This only reads the cache, so a blocked client is turned away before
+    any password hash is computed.
+    '''
+    keys = _keys(email, ip)
+    counts = _cache().get_many(list(keys))
+    if any(counts.get(key, 0) >= limit for key, limit in keys.items()):
+        raise Throttled(wait=settings.LOGIN_RATE_LIMIT_WINDOW)
+
+
+def record_login_failure(email, ip):
+    '''Count a failed login against the email and the address'''
+    cache = _cache()
+    for key in _keys(email, ip):
+        # add() starts the window; incr() keeps its original expiry.
+        if not cache.add(key, 1, settings.LOGIN_RATE_LIMIT_WINDOW):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, settings.LOGIN_RATE_LIMIT_WINDOW)
+
+
+def reset_login_failures(email):
+    '''Forget failures for the email after a successful login'''
+    keys = _keys(email, None)
+    _cache().delete_many(list(keys))
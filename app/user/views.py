@@ -1,7 +1,12 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.settings import api_settings
 from rest_framework.utils.field_mapping import get_relation_kwargs
+from core.authentication import (
+    CachedTokenAuthentication, get_valid_token, rotate_token, token_expires
+)
 from user.serializers import UserSerializer, AuthTokenSerialzer
 
 
@@ -10,16 +15,35 @@ class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
  
 
+def token_response(token):
+    return Response({'token': token.key, 'expires': token_expires(token)})
+
+
 class CreateTokenView(ObtainAuthToken):
     '''create a new auth token for a user'''
     serializer_class = AuthTokenSerialzer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token = get_valid_token(serializer.validated_data['user'])
+        return token_response(token)
+
+
+class RefreshTokenView(APIView):
+    '''Replace the authenticated token with a new one'''
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        return token_response(rotate_token(request.user))
+
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     '''Manage authenticated user'''
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
 